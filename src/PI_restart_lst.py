@@ -1,20 +1,41 @@
 # This is a XPPython3 plugin to stop/start LST plugin to provoke
 # a config file reload.
 #
+# The command only requests a reset. The reset itself is performed later
+# by a flight loop, once no other request came during DEBOUNCE_TIME seconds,
+# so that repeated key presses result in a single reload.
+#
+# Optionally, Init.lst and Objects.lst are watched from a low frequency flight loop,
+# and a reset is requested when one of them changed and is stable again.
+# Only modification time and size are checked, files are never read.
+#
 import os
+import time
 import xp
 from traceback import print_exc
 
-RELEASE = "1.0.1"  # local version number
+RELEASE = "1.2.1"  # local version number
 
 # Changelog:
 #
+# 19-OCT-2026: 1.2.1 - Request made before first frame after a reset is no longer lost
+# 19-OCT-2026: 1.2.0 - Optional reset on Init.lst or Objects.lst change
+# 19-OCT-2026: 1.1.0 - Reset deferred to a flight loop, debounced, with timings
 # 12-SEP-2023: 1.0.1 - Localized path to x-codrdesigns.livingscenerytech domain
 # 08-SEP-2023: 1.0.0 - Initial creation
 #
 LST_RESET_COMMAND = "codrdesigns/livingscenerytech/lst_reset"
 LST_RESET_COMMAND_DESC = "Stop and restart LST to provoke config file re-loading"
 LST_PLUGIN_SIGNATURE = "com.x-codrdesigns.livingscenerytech"
+DEBOUNCE_TIME = 1.0  # seconds without new request before reset is performed
+
+LST_WATCH_COMMAND = "codrdesigns/livingscenerytech/lst_watch"
+LST_WATCH_COMMAND_DESC = "Toggle LST reset when Init.lst or Objects.lst change"
+WATCH = False  # watch files when plugin is enabled, can be toggled with command
+WATCH_FILES = ["Init.lst", "Objects.lst"]
+WATCH_FOLDER = None  # folder of watched files, None for folder of LST plugin
+WATCH_INTERVAL = 2.0  # seconds between checks
+WATCH_STABLE = 3.0  # seconds a changed file must stay unchanged before reset
 
 class PythonInterface:
 
@@ -29,6 +50,17 @@ class PythonInterface:
         self.lst_plugin = None
         self.resetLstCmdRef = None
         self.isRunningRef = None
+        self.resetLoop = None
+        self.reset_requested = None  # elapsed sim time of last reset request, None if no reset pending
+        self.reset_requests = 0  # number of requests coalesced in pending reset
+        self.reset_enabled_at = None  # time.perf_counter() when LST was re-enabled, until first frame after it
+        self.reset_timings = None  # (disable, enable, first frame) durations of last reset, in seconds
+        self.watchLstCmdRef = None
+        self.watchLoop = None
+        self.watching = WATCH
+        self.watch_paths = []
+        self.watch_signatures = {}  # path: (mtime, size) of last check, None if no file
+        self.watch_changed = None  # elapsed sim time of last change seen, None if no change pending
 
     def info(self, text):
         print(self.Info, text)
@@ -47,6 +79,9 @@ class PythonInterface:
         else:
             self.debug("PI::XPluginStop: command not registered.")
 
+        self.watchLstCmdRef = xp.createCommand(LST_WATCH_COMMAND, LST_WATCH_COMMAND_DESC)
+        xp.registerCommandHandler(self.watchLstCmdRef, self.watchLstCmd, 1, None)
+
         self.menuIdx = xp.appendMenuItemWithCommand(xp.findPluginsMenu(), self.Name, self.resetLstCmdRef)
         if self.menuIdx is None or (self.menuIdx is not None and self.menuIdx < 0):
             self.info("PI::XPluginStart: menu not added.")
@@ -68,6 +103,10 @@ class PythonInterface:
         else:
             self.debug("PI::XPluginStop: command not unregistered.")
 
+        if self.watchLstCmdRef:
+            xp.unregisterCommandHandler(self.watchLstCmdRef, self.watchLstCmd, 1, None)
+            self.watchLstCmdRef = None
+
         if self.menuIdx is not None and self.menuIdx >= 0:
             oldidx = self.menuIdx
             xp.removeMenuItem(xp.findPluginsMenu(), self.menuIdx)
@@ -90,7 +129,13 @@ class PythonInterface:
                     return 0
                 self.lst_plugin = plugin_id
                 self.debug(f"PI::XPluginEnable: found {LST_PLUGIN_SIGNATURE} at id {plugin_id}")
+            if self.resetLoop is None:
+                self.resetLoop = xp.createFlightLoop(self.resetLstLoop)
+            if self.watchLoop is None:
+                self.watchLoop = xp.createFlightLoop(self.watchLstLoop)
             self.enabled = True
+            if self.watching:
+                self.startWatch()
             self.debug("PI::XPluginEnable: ..enabled.")
             return 1
         except:
@@ -101,6 +146,14 @@ class PythonInterface:
     def XPluginDisable(self):
         self.debug("PI::XPluginDisable: disabling..")
         try:
+            if self.resetLoop is not None:
+                xp.destroyFlightLoop(self.resetLoop)
+                self.resetLoop = None
+            if self.watchLoop is not None:
+                xp.destroyFlightLoop(self.watchLoop)
+                self.watchLoop = None
+            self.reset_requested = None
+            self.reset_enabled_at = None
             self.lst_plugin = None
             self.enabled = False
             self.debug("PI::XPluginDisable: disabled.")
@@ -116,23 +169,134 @@ class PythonInterface:
     def XPluginReceiveMessage(self, inFromWho, inMessage, inParam):
         pass
 
-    def resetLstCmd(self, *args, **kwargs) -> int:
+    def resetLstCmd(self, commandRef, phase, refCon) -> int:
+        # Only requests a reset, resetLstLoop() performs it.
         try:
-            if self.enabled:
-                self.debug("PI::command executing...")
-                if self.lst_plugin is None:
-                    self.info("PI::command: no plugin identifier")
-                if self.lst_plugin == xp.NO_PLUGIN_ID:
-                    self.info("PI::command: invalid plugin identifier (plugin signature not found)")
-                if xp.isPluginEnabled(self.lst_plugin):
-                    self.debug("lst plugin enabled. disabling..")
-                    xp.disablePlugin(self.lst_plugin)
-                    self.debug("..disabled. enabling..")
-                    xp.enablePlugin(self.lst_plugin)
-                    self.debug("..enabled.")
-                self.info("LST reset")
-                return 0
+            if phase == xp.CommandBegin:
+                self.requestReset("command")
         except:
             self.debug("PI::command: exception:")
             print_exc()
         return 0  # callback must return 0 or 1.
+
+    def requestReset(self, reason: str) -> bool:
+        if not self.enabled or self.resetLoop is None:
+            self.debug(f"PI::{reason}: not enabled")
+            return False
+        if self.lst_plugin is None or self.lst_plugin == xp.NO_PLUGIN_ID:
+            self.info(f"PI::{reason}: invalid plugin identifier (plugin signature not found)")
+            return False
+        self.reset_requested = xp.getElapsedTime()
+        self.reset_requests = self.reset_requests + 1
+        if self.reset_enabled_at is None:  # otherwise the loop runs next frame to time the last reset, then waits for this one
+            xp.scheduleFlightLoop(self.resetLoop, DEBOUNCE_TIME, 1)
+        self.debug(f"PI::{reason}: reset requested ({self.reset_requests} pending)")
+        return True
+
+    def resetLstLoop(self, sinceLast, elapsedTime, counter, refCon) -> float:
+        # Performs a pending reset once the debounce window is over,
+        # then measures the time to the first frame after LST is enabled again.
+        # A request made before that first frame is debounced from there.
+        try:
+            if self.reset_enabled_at is not None:
+                recovery = time.perf_counter() - self.reset_enabled_at
+                self.reset_enabled_at = None
+                self.reset_timings = self.reset_timings + (recovery,)
+                disable, enable, recovery = self.reset_timings
+                self.info(f"LST reset: disable {disable:.3f}s, enable {enable:.3f}s, first frame {recovery:.3f}s")
+            if self.reset_requested is None:
+                return 0  # no more call until next request
+            wait = self.reset_requested + DEBOUNCE_TIME - xp.getElapsedTime()
+            if wait > 0:  # request came in after scheduling
+                return wait
+            requests = self.reset_requests
+            self.reset_requested = None
+            self.reset_requests = 0
+            if not xp.isPluginEnabled(self.lst_plugin):
+                self.info("LST reset: lst plugin not enabled, not reset")
+                return 0
+            self.debug(f"lst plugin enabled. disabling.. ({requests} request(s))")
+            start = time.perf_counter()
+            xp.disablePlugin(self.lst_plugin)
+            disabled = time.perf_counter()
+            self.debug("..disabled. enabling..")
+            xp.enablePlugin(self.lst_plugin)
+            self.reset_enabled_at = time.perf_counter()
+            self.debug("..enabled.")
+            self.reset_timings = (disabled - start, self.reset_enabled_at - disabled)
+            return -1  # next frame
+        except:
+            self.debug("PI::flight loop: exception:")
+            print_exc()
+            self.reset_enabled_at = None
+        return 0
+
+    def watchLstCmd(self, commandRef, phase, refCon) -> int:
+        try:
+            if phase == xp.CommandBegin:
+                if self.watching:
+                    self.stopWatch()
+                else:
+                    self.startWatch()
+        except:
+            self.debug("PI::watch command: exception:")
+            print_exc()
+        return 0
+
+    def watchFolder(self) -> str:
+        if WATCH_FOLDER is not None:
+            return WATCH_FOLDER
+        # X-Plane/Resources/plugins/LST/64/lin.xpl -> X-Plane/Resources/plugins/LST
+        info = xp.getPluginInfo(self.lst_plugin)
+        return os.path.dirname(os.path.dirname(info.filePath))
+
+    @staticmethod
+    def signature(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def startWatch(self):
+        self.watching = True
+        if not self.enabled or self.watchLoop is None:
+            return
+        folder = self.watchFolder()
+        self.watch_paths = [os.path.join(folder, f) for f in WATCH_FILES]
+        self.watch_signatures = {p: PythonInterface.signature(p) for p in self.watch_paths}
+        self.watch_changed = None
+        for path, sig in self.watch_signatures.items():
+            if sig is None:
+                self.info(f"PI::watch: {path} not found")
+        xp.scheduleFlightLoop(self.watchLoop, WATCH_INTERVAL, 1)
+        self.info(f"watching {', '.join(WATCH_FILES)} in {folder}")
+
+    def stopWatch(self):
+        self.watching = False
+        if self.watchLoop is not None:
+            xp.scheduleFlightLoop(self.watchLoop, 0, 1)
+        self.watch_changed = None
+        self.info("not watching")
+
+    def watchLstLoop(self, sinceLast, elapsedTime, counter, refCon) -> float:
+        # Requests a reset when watched files changed and did not change since WATCH_STABLE seconds
+        try:
+            if not self.watching:
+                return 0
+            now = xp.getElapsedTime()
+            for path in self.watch_paths:
+                sig = PythonInterface.signature(path)
+                if sig != self.watch_signatures.get(path):
+                    self.watch_signatures[path] = sig
+                    self.watch_changed = now
+                    self.debug(f"PI::watch: {os.path.basename(path)} changed")
+            stable = self.watch_changed is not None and now - self.watch_changed >= WATCH_STABLE
+            if stable and None not in self.watch_signatures.values():  # not while a file is being replaced
+                self.watch_changed = None
+                self.requestReset("watch")
+            return WATCH_INTERVAL
+        except:
+            self.debug("PI::watch: exception:")
+            print_exc()
+        return WATCH_INTERVAL
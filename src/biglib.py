@@ -1,25 +1,42 @@
 import os
 import glob
 import re
+import sys
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BigLib")
 
+CACHE_VERSION = 1
+SCENERY_FOLDER = "Custom Scenery"  # a new scenery changes its modification time
+
 class BigLib:
     """Fast and naive class to collect "all" library objects in X-Plane directory.
 
     Please tell me if I don't collect some objects.
     This is used in gt2lst to check whether an object exists before spitting it in LST files.
+
+    Libraries are interned: self.libraries holds each library folder once, and each virtual path
+    maps to a flat tuple (library id, relative path, library id, relative path...) of its exports.
+    The index can be cached to a JSON file, reused as long as libraries did not change.
     """
-    def __init__(self, home: str):
+    def __init__(self, home: str, cache: str = None):
         self.home = home
-        self.objects = {}
+        self.cache = cache  # cache file, None for no cache
+        self.libraries = []  # library id -> library folder
+        self.library_ids = {}  # library folder -> library id
+        self.objects = {}  # virtual path -> (library id, relative path, ...)
         self.localpath = None
         self.init()
 
     def init(self):
+        if self.cache is not None and self.load(self.cache):
+            return
         self.build()
+        if self.cache is not None:
+            try:
+                self.save(self.cache)
+            except OSError:
+                logger.warning(f"could not save library cache {self.cache}")
 
     def set_local_path(self, path):
         self.localpath = path
@@ -28,11 +45,80 @@ class BigLib:
         if not os.path.exists(self.home):
             logger.warning(f"X-Plane folder {self.home} not found, no libraries loaded")
             return
-        libs = sorted(glob.glob(os.path.join(self.home, "**/library.txt"), recursive=True))
+        libs = self.library_files()
         for lib in libs:
             self.parse_lib(lib)
         logger.info(f"total {len(self.objects)} objects in {len(libs)} libraries")
 
+    def library_id(self, libpath: str) -> int:
+        lib_id = self.library_ids.get(libpath)
+        if lib_id is None:
+            lib_id = len(self.libraries)
+            self.libraries.append(libpath)
+            self.library_ids[libpath] = lib_id
+        return lib_id
+
+    def files(self, path) -> list:
+        # [(library folder, relative path, library file name)] exported for virtual path, None if not found
+        entries = self.objects.get(path)
+        if entries is None:
+            return None
+        return [(self.libraries[entries[i]], entries[i + 1], "library.txt") for i in range(0, len(entries), 2)]
+
+    def library_files(self) -> list:
+        # all library.txt files of X-Plane folder
+        return sorted(glob.glob(os.path.join(self.home, "**/library.txt"), recursive=True))
+
+    def signature(self) -> dict:
+        # modification times of scenery folder and of all library.txt files found by build(),
+        # so that added, removed or changed libraries anywhere invalidate the cache
+        sig = {}
+        for fn in [os.path.join(self.home, SCENERY_FOLDER)] + self.library_files():
+            try:
+                sig[fn] = os.stat(fn).st_mtime_ns
+            except OSError:
+                sig[fn] = None
+        return sig
+
+    def save(self, filename: str):
+        import json
+
+        with open(filename, "w") as fp:
+            json.dump(
+                {
+                    "version": CACHE_VERSION,
+                    "home": os.path.abspath(self.home),
+                    "signature": self.signature(),
+                    "libraries": self.libraries,
+                    "objects": self.objects,
+                },
+                fp,
+            )
+        logger.debug(f"library cache {filename} saved")
+
+    def load(self, filename: str) -> bool:
+        # Loads index from cache file, returns False if there is none or if it is out of date
+        import json
+
+        if not os.path.exists(filename):
+            return False
+        try:
+            with open(filename, "r") as fp:
+                data = json.load(fp)
+        except ValueError:
+            logger.warning(f"library cache {filename} unreadable, ignored")
+            return False
+        if data.get("version") != CACHE_VERSION or data.get("home") != os.path.abspath(self.home):
+            return False
+        if data.get("signature") != self.signature():
+            logger.debug(f"library cache {filename} out of date")
+            return False
+        self.libraries = data.get("libraries", [])
+        self.library_ids = {lib: i for i, lib in enumerate(self.libraries)}
+        self.objects = {sys.intern(k): tuple(sys.intern(e) if isinstance(e, str) else e for e in v) for k, v in data.get("objects", {}).items()}
+        logger.info(f"total {len(self.objects)} objects in {len(self.libraries)} libraries (cached)")
+        return True
+
     def parse_lib(self, libfn):
         ## WHAT IS THE SEPARATOR?? Not in the specs.
         # What about file names with space in their name
@@ -40,6 +126,7 @@ class BigLib:
             logger.warning(f"libray folder {libfn} not found, no object loaded")
             return
         libpath, libname = os.path.split(libfn)
+        lib_id = self.library_id(libpath)
         count = 0
         errors = 0
         fp = open(libfn, "r")  # , encoding="UTF-8"
@@ -51,13 +138,12 @@ class BigLib:
                 args = re.split(r"\t| ", line)
                 if len(args) > 2:
                     if args[2] != "":
-                        curr = self.objects.get(args[1], [])
                         objpath = os.path.join(libpath, args[2])
                         if not os.path.exists(objpath):
                             logger.debug(f"{objpath} not found")
                             errors = errors + 1
-                        curr.append((libpath, args[2], libname))
-                        self.objects[args[1]] = curr
+                        vpath = sys.intern(args[1])
+                        self.objects[vpath] = self.objects.get(vpath, ()) + (lib_id, sys.intern(args[2]))
                         count = count + 1
                     else:
                         logger.debug(f"problem parsing {line}")
@@ -65,13 +151,16 @@ class BigLib:
         fp.close()
         logger.debug(f"{libfn}: {count} objects{f', {errors} object files not found' if errors > 0 else ''}")
 
-    def check(self, path, complain: bool = True):
-        # return False if no file associated with the library path was found
-        files = self.objects.get(path)
+    def check(self, path, complain: bool = True, localpath: str = None):
+        # return False if no file associated with the library path was found.
+        # localpath is the folder of local objects of the caller, set_local_path() folder if None.
+        # Callers that share a BigLib pass their own, the shared index is not changed.
+        files = self.files(path)
         if files is None:
             # May be it is in a local library
-            if self.localpath is not None:
-                fn = os.path.join(self.localpath, path)
+            localpath = localpath if localpath is not None else self.localpath
+            if localpath is not None:
+                fn = os.path.join(localpath, path)
                 if os.path.exists(fn):
                     logger.debug(f"object {path} file {fn} found locally")
                     return True
@@ -103,10 +192,8 @@ class BigLib:
 # CONVERT
 #
 if __name__ == '__main__':
-    bl = BigLib(XPLANE_ROOT_PATH)
-
-    # To view transformation on terminal, uses:
-    bl.build()
+    logging.basicConfig(level=logging.INFO)
+    bl = BigLib(sys.argv[1] if len(sys.argv) > 1 else ".")
 
     print(bl.check("MisterX_Library/Airport/Aircraft/Airbus_A320_200/Finnair.obj"))
     print(bl.check("opensceneryx/objects/vehicles/commercial/trucks/dhl.obj"))
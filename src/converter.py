@@ -10,29 +10,23 @@
 #
 # See adjustments at end of this file.
 #
+# Heavy modules (biglib, json) are only imported when they are needed
+# so that the command line starts fast.
+#
 import logging
-import sys
 import os
-import json
-import argparse
 from math import sin, cos, atan2, sqrt, radians
-from datetime import datetime
-from biglib import BigLib
+
+from fixedpoint import DECIMALS, SCALE, to_fixed, to_float, fixed_array, round_fixed, truncate_fixed, format_fixed
+from tiling import bbox, partition
 
 
 DEFAULT_OBJECT = "library/follow_me.obj"
 
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__file__)
 
 
-# Command-line arguments
-#
-parser = argparse.ArgumentParser(description="Convert Ground Traffic file to LST")
-parser.add_argument("--xplane", metavar="xplane_root_path", type=str, help="X-Plane Home Directory, to locate library objects")
-parser.add_argument("ground_traffic_file", metavar="ground_traffic_file", type=str, nargs="?", default="GroundTraffic.txt", help="Ground Traffic file to convert")
-
 # GT uses "distance" between objects, LST uses "time" between objects.
 def get_time(speed, distance):
     # speed in km/h, distance in meters, return seconds
@@ -57,23 +51,91 @@ def distance(lat1_d, lon1_d, lat2_d, lon2_d):
     return R * c
 
 
-def total_length(ls):
+def path_length(path):
+    # length in km of a flat fixed-point (lat, lon, lat, lon...) array
     total = 0
-    end = len(ls) - 1
-    for i in range(end):
-        total = total + distance(ls[i][1], ls[i][0], ls[i + 1][1], ls[i + 1][0])
+    for i in range(2, len(path), 2):
+        total = total + distance(path[i - 2] / SCALE, path[i - 1] / SCALE, path[i] / SCALE, path[i + 1] / SCALE)
     return total
 
 
+def coordinates(path, precision: int = DECIMALS):
+    # GeoJSON [[lon, lat]...] coordinates of a flat fixed-point (lat, lon, lat, lon...) array
+    return [[to_float(round_fixed(path[i + 1], precision)), to_float(round_fixed(path[i], precision))] for i in range(0, len(path), 2)]
+
+
+def convert_command(command):
+    # Converts a command in a worker process, returns what its cache needs
+    out = command.convert()
+    return out, command.length()
+
+
 class Converter:
+    # Conversion results are cached. A converter is only converted again when one of its
+    # input attributes, or one of its children's, has been assigned since last conversion.
+    # Lists changed in place (sequence, waypoints, cars...) must be followed by a touch().
+    #
+    # Converters use __slots__ to keep large inputs compact. The path of a command
+    # is its waypoints array of fixed-point (lat, lon) pairs, used for both LST and GeoJSON output,
+    # written with precision decimals.
+    #
+    __slots__ = ("version", "converted", "total", "line_num", "out")
+
+    OUTPUT = ["out", "version", "converted", "total"]  # attributes that do not invalidate
+    NO_PATH = fixed_array()
+
     def __init__(self, **kwargs):
+        self.version = 0  # incremented each time an input attribute changes
+        self.converted = None  # state() at last conversion
+        self.total = None  # length of path in km, once computed
         self.line_num = kwargs.get("line_num")
         self.out = []
-        self.ls_points = []
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name not in Converter.OUTPUT:
+            object.__setattr__(self, "version", getattr(self, "version", 0) + 1)
+
+    def touch(self):
+        self.version = self.version + 1
+
+    def children(self) -> list:
+        # converters this converter's output depends on
+        return []
+
+    def state(self) -> tuple:
+        return (self.version, tuple(c.state() for c in self.children()))
+
+    @property
+    def dirty(self) -> bool:
+        return self.converted != self.state()
+
+    def convert(self):
+        state = self.state()
+        if state != self.converted:
+            self.reset()
+            self.build()
+            self.converted = state
+            self.total = None
+        return self.get()
+
+    def build(self):
+        # builds self.out
+        pass
+
+    def path(self):
+        # (lat, lon) pairs followed by command
+        return Converter.NO_PATH
+
+    def length(self) -> float:
+        # length of path in km, computed once per conversion
+        self.convert()
+        if self.total is None:
+            self.total = path_length(self.path())
+        return self.total
 
     def reset(self):
         self.out = []
-        self.ls_points = []
 
     def nl(self):
         self.out.append("")
@@ -85,7 +147,7 @@ class Converter:
         self.out.append(line)
 
     def append(self, lines):
-        self.out = self.out + lines
+        self.out.extend(lines)
 
     def get(self):
         return self.out
@@ -95,6 +157,8 @@ class Converter:
 
 
 class Condition(Converter):
+    __slots__ = ("obj", "val1", "val2", "ands")
+
     def __init__(self, obj: str, val1, val2, **kwargs):
         Converter.__init__(self, **kwargs)
         self.obj = obj
@@ -102,18 +166,21 @@ class Condition(Converter):
         self.val2 = val2
         self.ands = []  # [ Condition ]
 
-    def convert(self):
-        self.reset()
+    def children(self):
+        return self.ands
+
+    def build(self):
         self.comment(f"when condition (line {self.line_num})")
         self.line(f"DREFOP,f,NULL,NULL,{self.obj},{self.val2}")
         if len(self.ands) > 0:
             for and_cond in self.ands:
                 self.comment(f"and condition (line {self.line_num})")
                 self.append(and_cond.convert())
-        return self.get()
 
 
 class SetDataref(Converter):
+    __slots__ = ("name", "slope", "curve", "duration")
+
     def __init__(self, name, slope, curve, duration, **kwargs):
         Converter.__init__(self, **kwargs)
         self.name = SetDataref.dataref(name)
@@ -132,8 +199,7 @@ class SetDataref(Converter):
         self.curve = "linear"
         self.duration = duration
 
-    def convert(self):
-        self.reset()
+    def build(self):
         self.comment(f"set dataref {self.name} (line {self.line_num})")
         # To reproduce the groundtraffic behavior, we set the value first,
         # then make it change according to the same pattern as GT.
@@ -142,7 +208,6 @@ class SetDataref(Converter):
         self.line(f"DREFOP,{self.name},{start},0,NULL,NULL")
         self.comment("make variation, GT values varies between 0 and 1")
         self.line(f"DREFOP,{self.name},{1 - start},{self.duration},NULL,NULL")
-        return self.get()
 
     @staticmethod
     def dataref(s):
@@ -157,26 +222,31 @@ class SetDataref(Converter):
 
 
 class Train(Converter):
+    __slots__ = ("name", "train_cars")
+
     def __init__(self, name: str, **kwargs):
         Converter.__init__(self, **kwargs)
         self.name = name
         self.train_cars = []
 
-    def convert(self):
-        self.reset()
+    def children(self):
+        return self.train_cars
+
+    def build(self):
         if len(self.train_cars) < 2:
             logger.warning("invalid train")
-            return []
+            return
         lead_car = self.train_cars[0]
         self.comment(f"train {self.name} (line {self.line_num})")
         self.line(f"TRAIN,{lead_car.obj}")
         for c in self.train_cars[1:]:
             # self.comment(f"converting route train {c} car")
             self.append(c.convert())
-        return self.get()
 
 
 class TrainCar(Converter):
+    __slots__ = ("lag", "offset", "heading", "obj")
+
     def __init__(self, lag, offset, heading, obj, **kwargs):
         Converter.__init__(self, **kwargs)
         self.lag = lag
@@ -185,16 +255,16 @@ class TrainCar(Converter):
         self.obj = obj
         logger.debug(f"{obj}")
 
-    def convert(self):
-        self.reset()
+    def build(self):
         self.line(f"TRAINCAR,{self.obj},{self.lag}")
-        return self.get()
 
 
 # ###################################
 # ROUTE
 #
 class Route(Converter):
+    __slots__ = ("speed", "offset", "heading", "reverse", "obj", "sequence", "waypoints", "precision")
+
     def __init__(self, speed: float, offset: float, heading: float, obj: str, **kwargs):
         Converter.__init__(self, **kwargs)
         self.speed = speed
@@ -202,16 +272,36 @@ class Route(Converter):
         self.heading = heading
         self.reverse = False
         self.obj = obj
-        self.sequence = []
+        self.sequence = []  # (command, argument), argument of "wp" is the index of the waypoint
+        self.waypoints = fixed_array()  # lat, lon, lat, lon...
+        self.precision = kwargs.get("precision", DECIMALS)
+
+    def add_wp(self, lat: int, lon: int):
+        self.sequence.append(("wp", len(self.waypoints) // 2))
+        self.waypoints.append(lat)
+        self.waypoints.append(lon)
+        self.touch()
+
+    def path(self):
+        return self.waypoints
 
     def label(self):
         if isinstance(self.obj, Train):
             return self.obj.name
         return self.obj
 
-    def convert(self):
+    def points(self):
+        wps = self.waypoints
+        return [(wps[i] / SCALE, wps[i + 1] / SCALE) for i in range(0, len(wps), 2)]
+
+    def children(self):
+        c = [obj[1] for obj in self.sequence if isinstance(obj[1], Converter)]
+        if isinstance(self.obj, Train):
+            c.append(self.obj)
+        return c
+
+    def build(self):
         # A GT route gets converted into a LST train
-        self.reset()
         if isinstance(self.obj, Train):  # whole train
             self.comment(
                 f"converting route train {self.obj.name} {'(reverse)' if self.reverse else ''} (line {self.line_num})"
@@ -233,8 +323,8 @@ class Route(Converter):
         for obj in self.sequence:
             cmd = str(obj[0]).lower()
             if cmd == "wp":
-                self.line(f"WP,{obj[1][0]},{obj[1][1]},{self.speed}")
-                self.ls_points.append([obj[1][1], obj[1][0]])
+                i = 2 * obj[1]
+                self.line(f"WP,{format_fixed(self.waypoints[i], self.precision)},{format_fixed(self.waypoints[i + 1], self.precision)},{self.speed}")
             elif cmd == "pause":
                 self.line(f"WAIT,{obj[1]}")
                 if "set" in obj:
@@ -259,30 +349,46 @@ class Route(Converter):
             else:
                 logger.warning(f"{cmd} command ignored {' '.join(obj)}")
         self.nl()
-        return self.get()
 
 
 # ###################################
 # HIGHWAY
 #
 class Highway(Converter):
+    __slots__ = ("speed", "spacing", "highway_cars", "waypoints", "precision")
+
     def __init__(self, speed: float, spacing: float, **kwargs):
         Converter.__init__(self, **kwargs)
         self.speed = speed
         self.spacing = spacing
         self.highway_cars = []
-        self.waypoints = []
+        self.waypoints = fixed_array()  # lat, lon, lat, lon...
+        self.precision = kwargs.get("precision", DECIMALS)
+
+    def add_wp(self, lat: int, lon: int):
+        self.waypoints.append(lat)
+        self.waypoints.append(lon)
+        self.touch()
+
+    def path(self):
+        return self.waypoints
 
     def label(self):
         if len(self.highway_cars) > 0:
             return self.highway_cars[0].obj
         return "noname"
 
-    def convert(self):
+    def points(self):
+        wps = self.waypoints
+        return [(wps[i] / SCALE, wps[i + 1] / SCALE) for i in range(0, len(wps), 2)]
+
+    def children(self):
+        return self.highway_cars
+
+    def build(self):
         # LST highway does not support multiple highwaycar,
         # so we make a highway (the same) for each highwaycar,
         # and play a bit on spawn times.
-        self.reset()
         lo = 0
         hi = 0
         for c in self.highway_cars:
@@ -290,14 +396,15 @@ class Highway(Converter):
             hi = hi + int(c.offset)
             self.comment(f"Highway at line {self.line_num} for highwaycar {c.obj}")
             self.line(f"HIGHWAY,{c.obj},{lo},{hi}")
-            for obj in self.waypoints:
-                self.line(f"WP,{obj[0]},{obj[1]},{self.speed}")
-                self.ls_points.append([obj[1], obj[0]])
+            wps = self.waypoints
+            for i in range(0, len(wps), 2):
+                self.line(f"WP,{format_fixed(wps[i], self.precision)},{format_fixed(wps[i + 1], self.precision)},{self.speed}")
             self.nl()
-        return self.get()
 
 
 class HighwayCar(Converter):
+    __slots__ = ("offset", "heading", "obj")
+
     def __init__(self, offset, heading, obj, **kwargs):
         Converter.__init__(self, **kwargs)
         self.offset = offset
@@ -318,16 +425,36 @@ class GroundTraffic(Converter):
     def __init__(self, fn: str, xplane_root_path: str, **kwargs):
         Converter.__init__(self, **kwargs)
 
-        self.objects = BigLib(xplane_root_path)
+        # Library index is only built if we have an X-Plane folder to look into, and none is given.
+        # It is built on a background thread while the file is parsed,
+        # object checks are queued until it is ready.
+        self.objects = kwargs.get("objects")  # BigLib, can be built once and shared by several conversions
+        self.library = None  # future BigLib while it is being built
+        self.pending_checks = []  # object names to check once library is built
+        if self.objects is None and xplane_root_path is not None:
+            from concurrent.futures import ThreadPoolExecutor
+            from biglib import BigLib
+
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="BigLib")
+            self.library = pool.submit(BigLib, xplane_root_path, cache=kwargs.get("library_cache"))
+            pool.shutdown(wait=False)
+        self.text = kwargs.get("text")  # GroundTraffic content, instead of file fn
+        self.stream = kwargs.get("stream")  # opened file-like object with GroundTraffic content, instead of file fn
+        self.local_path = kwargs.get("local_path")  # folder of local objects, defaults to folder of file fn
         self.check_objects = kwargs.get("check_objects", False)
         self.replace_missing = kwargs.get("replace", False)
         self.replacee = kwargs.get("replacee", DEFAULT_OBJECT)
         self.box_buffer = kwargs.get("bbox_buffer", 0.010)
         self.bbox_rounding = kwargs.get("bbox_rounding", 10000)
+        self.tile_size = kwargs.get("tile_size")  # in degrees, None for a single tile
+        self.packed = kwargs.get("packed", False)  # paths in packed binary format instead of GeoJSON
+        self.workers = kwargs.get("workers")  # number of worker processes for conversion, None for serial
+        self.precision = kwargs.get("precision", DECIMALS)  # decimals of coordinates in output files
 
         self.water = False
         self.debug = False
         self.filename = fn
+        self.localpath = None  # folder of local objects of loaded file
         self.input_lines = []
 
         self.commands = []
@@ -337,10 +464,11 @@ class GroundTraffic(Converter):
         self.highways = []
         self.datarefs = {}
 
-        self.north = -90
-        self.south = 90
-        self.east = -180
-        self.west = 180
+        # fixed-point bounding box of all waypoints
+        self.north = to_fixed(-90)
+        self.south = to_fixed(90)
+        self.east = to_fixed(-180)
+        self.west = to_fixed(180)
 
         self.features = []
 
@@ -348,11 +476,28 @@ class GroundTraffic(Converter):
 
     def init(self):
         if self.replace_missing and self.replacee is not None:
-            self.check_objects(self.replacee)
+            self.check_object(self.replacee)
         self.load()
+        self.resolve_checks()
 
     def check_object(self, name):
-        return self.objects.check(name)
+        # returns None if check is queued until library is built
+        if self.library is not None:
+            self.pending_checks.append(name)
+            return None
+        if self.objects is None:  # no library, no check
+            return True
+        return self.objects.check(name, localpath=self.localpath)
+
+    def resolve_checks(self):
+        # waits for library and performs queued checks
+        if self.library is None:
+            return
+        self.objects = self.library.result()
+        self.library = None
+        for name in self.pending_checks:
+            self.objects.check(name, localpath=self.localpath)
+        self.pending_checks = []
 
     def load(self):
         # Loadss and parses GroundTraffic.txt file.
@@ -371,13 +516,23 @@ class GroundTraffic(Converter):
                 return get_line(file_pointer)
             return line
 
-        if not os.path.exists(self.filename):
-            logger.warning(f"file {self.filename} not found")
-            return
-
-        localpath, basename = os.path.split(os.path.abspath(self.filename))
-        self.objects.set_local_path(localpath)
-        fp = open(self.filename, "r", encoding="utf-8", errors="ignore")
+        localpath = self.local_path
+        if self.text is not None:
+            import io
+
+            fp = io.StringIO(self.text)
+        elif self.stream is not None:
+            fp = self.stream
+        else:
+            if not os.path.exists(self.filename):
+                logger.warning(f"file {self.filename} not found")
+                return
+            from lstio import open_input
+
+            if localpath is None:
+                localpath = os.path.dirname(os.path.abspath(self.filename))
+            fp = open_input(self.filename, encoding="utf-8", errors="ignore")
+        self.localpath = localpath  # kept here, objects may be a BigLib shared by other conversions
         line = get_line(fp)
 
         current_command = None
@@ -446,6 +601,7 @@ class GroundTraffic(Converter):
                     heading=args[3],
                     obj=name,
                     line_num=line_num,
+                    precision=self.precision,
                 )  # obj=name
                 if self.is_train(name):
                     last_route.obj = self.trains[name]
@@ -522,9 +678,9 @@ class GroundTraffic(Converter):
                         last_route.reverse = True
                         # last_route.sequence.append(("reverse"))
                     else:
-                        fargs = [float(f) for f in args]
+                        fargs = [to_fixed(f) for f in args]
                         self.bb(*fargs)
-                        last_route.sequence.append(("wp", fargs))
+                        last_route.add_wp(*fargs)
 
                     if last_cond is not None and args[0] not in ["when", "and"]:
                         last_cond = None
@@ -543,7 +699,7 @@ class GroundTraffic(Converter):
                     )
                     continue
                 last_highway = Highway(
-                    speed=args[1], spacing=args[2], line_num=line_num
+                    speed=args[1], spacing=args[2], line_num=line_num, precision=self.precision
                 )
                 self.highways.append(last_highway)
                 # wagon or waypoints ?
@@ -569,12 +725,12 @@ class GroundTraffic(Converter):
                                 f"invalid highway waypoint line '{line}', missing arguments?, ignoring"
                             )
                         else:
-                            points = [float(f) for f in args]
-                            last_highway.waypoints.append(points)
+                            points = [to_fixed(f) for f in args]
+                            last_highway.add_wp(*points)
                             self.bb(*points)
                     line = get_line(fp)
                 logger.debug(
-                    f"created highway @{line_num} {len(last_highway.highway_cars)} {len(last_highway.waypoints)}"
+                    f"created highway @{line_num} {len(last_highway.highway_cars)} {len(last_highway.waypoints) // 2}"
                 )
                 current_command = last_highway
                 last_highway = None
@@ -592,7 +748,8 @@ class GroundTraffic(Converter):
 
             line = get_line(fp)
 
-        fp.close()
+        if fp is not self.stream:  # caller closes its stream
+            fp.close()
         logger.debug(f"{self.filename} {len(self.input_lines)} lines")
 
     def is_train(self, name) -> bool:
@@ -608,34 +765,34 @@ class GroundTraffic(Converter):
         if lon < self.west:
             self.west = lon
 
-    def bounding_box(self):
-        logger.debug(f"{(self.north, self.south, self.east, self.west)}")
-        n = self.north
-        s = self.south
+    def box(self) -> tuple:
+        # (north, south, east, west) of all waypoints, in degrees
+        return tuple(to_float(v) for v in (self.north, self.south, self.east, self.west))
+
+    def bounding_box(self, box=None):
+        # box is (north, south, east, west), defaults to whole file.
+        # Buffer and rounding are computed on fixed-point values, so that bounds are exact decimals.
+        if box is None:
+            box = self.box()
+        logger.debug(f"{box}")
+        (n, s, e, w) = [to_fixed(v) for v in box]
+        buffer = to_fixed(self.box_buffer)
+        decimals = len(str(self.bbox_rounding)) - 1  # bbox_rounding is a power of 10
         if s > n:
             t = s
             s = n
             n = t
-        n = min(
-            int((n + self.box_buffer) * self.bbox_rounding) / self.bbox_rounding, 90
-        )
-        s = max(
-            int((s - self.box_buffer) * self.bbox_rounding) / self.bbox_rounding, -90
-        )
-        e = self.east
-        w = self.west
+        n = min(truncate_fixed(n + buffer, decimals), to_fixed(90))
+        s = max(truncate_fixed(s - buffer, decimals), to_fixed(-90))
         if e < w:
             t = w
             w = e
             e = t
-        e = min(
-            int((e + self.box_buffer) * self.bbox_rounding) / self.bbox_rounding, 180
-        )
-        w = max(
-            int((w - self.box_buffer) * self.bbox_rounding) / self.bbox_rounding, -180
-        )
-        logger.debug(f"{(n, s, e, w)}")
-        return (n, s, e, w)
+        e = min(truncate_fixed(e + buffer, decimals), to_fixed(180))
+        w = max(truncate_fixed(w - buffer, decimals), to_fixed(-180))
+        box = tuple(to_float(v) for v in (n, s, e, w))
+        logger.debug(f"{box}")
+        return box
 
     def print(self):
         SEPL = 80
@@ -652,43 +809,104 @@ class GroundTraffic(Converter):
         # }, indent=2))
         print("=" * SEPL)
 
+    def tiles(self):
+        # Partitions commands into tiles of tile_size degrees.
+        # Comments and commands without waypoints go with the next command that has waypoints.
+        groups = []
+        pending = []
+        for c in self.commands:
+            pending.append(c)
+            if not isinstance(c, str) and len(c.points()) > 0:
+                groups.append((pending, bbox(c.points())))
+                pending = []
+        if len(pending) > 0 and len(groups) > 0:
+            groups[-1][0].extend(pending)
+        tiles = partition(groups, self.tile_size)
+        for tile in tiles:
+            tile.items = [c for group in tile.items for c in group]
+        return tiles
+
     def save(self, root=None):
-        if root is None:
-            fn = self.filename.replace(".txt", "").replace(".TXT", "")
-            args = os.path.split(fn)
-            root = "-" + args[1]
+        from lstio import input_name
 
-        self.mkinit()
-        with open(os.path.join(args[0], "init" + root + ".lst"), "w") as fp:
-            fp.write("\n".join(self.out) + "\n")
-        logger.info(f"{'init'+root+'.lst'} created")
+        dirname, basename = os.path.split(input_name(self.filename).replace(".txt", "").replace(".TXT", ""))
+        if root is None:
+            root = "-" + basename
 
-        self.mkobjects()
-        with open(os.path.join(args[0], "objects" + root + ".lst"), "w") as fp:
-            fp.write("\n".join(self.out) + "\n")
-        logger.info(f"{'objects'+root+'.lst'} created")
-
-        with open(os.path.join(args[0], "paths" + root + ".geojson"), "w") as fp:
-            fp.write(
-                json.dumps(
-                    {"type": "FeatureCollection", "features": self.features}, indent=2
-                )
-            )
-        logger.info(f"{'paths'+root+'.geojson'} created")
+        if self.tile_size is None:
+            self.save_files(dirname, root)
+        else:
+            tiles = self.tiles()
+            for tile in tiles:
+                self.save_files(dirname, root + tile.name(), commands=tile.items, box=tile.bounding_box())
+            logger.info(f"{len(tiles)} tiles of {self.tile_size}° created")
 
         if len(self.datarefs) > 0:
-            self.mkdatarefs()
-            with open(os.path.join(args[0], "datarefs" + root + ".lst"), "w") as fp:
-                fp.write("\n".join(self.out) + "\n")
-            logger.info(f"{'datarefs'+root+'.lst'} created")
+            self.write(dirname, "datarefs" + root + ".lst", self.datarefs_content())
+
+    def init_content(self, box=None) -> str:
+        self.mkinit(box=box)
+        return "\n".join(self.out) + "\n"
+
+    def objects_content(self, commands=None, box=None) -> str:
+        # also builds GeoJSON features returned by paths()
+        self.mkobjects(commands=commands, box=box)
+        return "\n".join(self.out) + "\n"
+
+    def paths(self) -> dict:
+        # GeoJSON features of last objects_content()
+        return {"type": "FeatureCollection", "features": self.features}
+
+    def datarefs_content(self) -> str:
+        if len(self.datarefs) == 0:
+            return None
+        self.mkdatarefs()
+        return "\n".join(self.out) + "\n"
+
+    def contents(self) -> dict:
+        # All converted content, in memory, not tiled
+        objects = self.objects_content()
+        return {
+            "init": self.init_content(),
+            "objects": objects,
+            "paths": self.paths(),
+            "datarefs": self.datarefs_content(),
+        }
+
+    def write(self, dirname, name, content):
+        # Output files are only replaced when their content changed
+        from lstio import write_if_changed
+
+        changed = write_if_changed(os.path.join(dirname, name), content)
+        logger.info(f"{name} {'created' if changed else 'unchanged'}")
+
+    def save_files(self, dirname, root, commands=None, box=None):
+        # Saves init, objects and paths files for commands in box, default to all commands
+        import json
+
+        self.write(dirname, "init" + root + ".lst", self.init_content(box=box))
+        self.write(dirname, "objects" + root + ".lst", self.objects_content(commands=commands, box=box))
+
+        if self.packed:
+            from lstpack import write_packed
+            from lstio import temporary, replace_if_changed
+
+            filename = os.path.join(dirname, "paths" + root + ".lstpack")
+            tmp = temporary(filename)
+            write_packed(tmp, self.features)
+            changed = replace_if_changed(tmp, filename)
+            logger.info(f"{'paths'+root+'.lstpack'} {'created' if changed else 'unchanged'}")
+            return
 
-    def mkinit(self):
+        self.write(dirname, "paths" + root + ".geojson", json.dumps(self.paths(), indent=2))
+
+    def mkinit(self, box=None):
         self.reset()
         # Debug flag
         # self.line("1" if self.debug else "0")
         self.line("1")  # force debug during development
         # Scenery boundaries
-        for i in self.bounding_box():
+        for i in self.bounding_box(box):
             self.line(str(i))
         # Priming time
         self.line("5")  # #seconds of preprocessing
@@ -697,10 +915,33 @@ class GroundTraffic(Converter):
         # Activation dataref
         self.comment("ACTIVEDREF,xcd/gt2lst/lst_active")
 
-    def mkobjects(self, output_comments: bool = True):
-        # Print header info
+    def convert_all(self, commands):
+        # Converts commands concurrently in a pool of worker processes.
+        # Results are stored in each command's cache, output order is left to the caller.
+        from concurrent.futures import ProcessPoolExecutor
+
+        todo = [c for c in commands if not isinstance(c, str) and c.dirty]
+        if len(todo) == 0:
+            return
+        chunksize = max(1, len(todo) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for c, (out, total) in zip(todo, pool.map(convert_command, todo, chunksize=chunksize)):
+                c.out = out
+                c.converted = c.state()
+                c.total = total
+        logger.debug(f"{len(todo)} commands converted by {self.workers} workers")
+
+    def mkobjects(self, output_comments: bool = True, commands=None, box=None):
+        # Converts commands, default to all commands, and builds their GeoJSON features
         self.reset()
-        for l in self.commands:
+        self.features = []
+        if commands is None:
+            commands = self.commands
+        if box is None:
+            box = self.box()
+        if self.workers is not None and self.workers > 1:
+            self.convert_all(commands)
+        for l in commands:
             r = None
             logger.debug(f"doing {type(l).__name__}: {l}")
             if isinstance(l, str):
@@ -714,18 +955,18 @@ class GroundTraffic(Converter):
                             "type": "Feature",
                             "properties": {
                                 "name": l.label(),
-                                "length(km)": round(total_length(l.ls_points), 3),
-                                "count": len(l.ls_points),
+                                "length(km)": round(l.length(), 3),
+                                "count": len(l.path()) // 2,
                             },
                             "geometry": {
                                 "type": "LineString",
-                                "coordinates": l.ls_points,
+                                "coordinates": coordinates(l.path(), l.precision),
                             },
                         }
                     )
             if r is not None and len(r) > 0:
                 self.append(r)
-        (n, s, e, w) = (self.north, self.south, self.east, self.west)
+        (n, s, e, w) = box
         self.features.append(
             {
                 "type": "Feature",
@@ -736,7 +977,7 @@ class GroundTraffic(Converter):
                 },
             }
         )
-        (n, s, e, w) = self.bounding_box()
+        (n, s, e, w) = self.bounding_box(box)
         self.features.append(
             {
                 "type": "Feature",
@@ -754,7 +995,33 @@ class GroundTraffic(Converter):
         for dref, value in self.datarefs.items():
             self.line(f"DREF,{dref},{value}")
 
+def convert(text: str = None, stream=None, objects=None, **kwargs) -> dict:
+    # Converts GroundTraffic content given as text or as an opened file-like object, without file.
+    # Returns init, objects and datarefs (None if no dataref) LST content and paths GeoJSON.
+    # objects is an optional BigLib, built once and reused across conversions.
+    if text is None and stream is None:
+        raise ValueError("convert() needs GroundTraffic content, as text or as stream")
+    gt = GroundTraffic(fn=kwargs.pop("fn", None), xplane_root_path=None, text=text, stream=stream, objects=objects, **kwargs)
+    return gt.contents()
+
+
 def main():
+    import sys
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Convert Ground Traffic file to LST")
+    parser.add_argument("--xplane", metavar="xplane_root_path", type=str, help="X-Plane Home Directory, to locate library objects")
+    parser.add_argument("--library-cache", metavar="cache_file", type=str, help="cache file of X-Plane library index, rebuilt when libraries change")
+    parser.add_argument("--tile", metavar="degrees", type=float, help="partition routes into tiles of that size, each with its own init/objects files")
+    parser.add_argument("--workers", metavar="count", type=int, help="convert routes in that many worker processes")
+    parser.add_argument("--packed", action="store_true", help="save paths in packed binary format with spatial index instead of GeoJSON")
+    parser.add_argument("--precision", metavar="decimals", type=int, default=DECIMALS, help=f"decimals of coordinates in output files (default {DECIMALS})")
+    parser.add_argument("ground_traffic_file", metavar="ground_traffic_file", type=str, nargs="?", default="GroundTraffic.txt", help="Ground Traffic file to convert")
+
     args = parser.parse_args()
     fn=args.ground_traffic_file
 
@@ -762,7 +1029,7 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    gt = GroundTraffic(fn=fn, xplane_root_path=args.xplane, bbox_buffer=0.001)
+    gt = GroundTraffic(fn=fn, xplane_root_path=args.xplane, library_cache=args.library_cache, bbox_buffer=0.001, tile_size=args.tile, packed=args.packed, workers=args.workers, precision=args.precision)
 
     # To view transformation on terminal, uses:
     # gt.print()
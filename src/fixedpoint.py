@@ -0,0 +1,52 @@
+# Fixed-point coordinates
+#
+# Coordinates are held as integer nano-degrees (1e-9 degree, about 0.1mm),
+# in array("q") of interleaved lat, lon when there are many of them.
+# Storage is compact, the snapping spatial hash divides integers exactly,
+# and output is formatted from the integers with the requested number of decimals,
+# without float representation noise. Tiling, bounding box filters and LST diff
+# hashes still work on degrees as floats.
+#
+from array import array
+
+DECIMALS = 9  # decimals of fixed-point values, and maximum output precision
+SCALE = 10**DECIMALS
+
+
+def to_fixed(value) -> int:
+    # from float or decimal string, exact up to DECIMALS decimals for coordinates
+    return int(round(float(value) * SCALE))
+
+
+def to_float(value: int) -> float:
+    return value / SCALE
+
+
+def fixed_array(values=()) -> array:
+    return array("q", values)
+
+
+def round_fixed(value: int, precision: int = DECIMALS) -> int:
+    # value rounded to precision decimals, half away from zero
+    if precision >= DECIMALS:
+        return value
+    step = 10 ** (DECIMALS - precision)
+    rounded = (abs(value) + step // 2) // step * step
+    return rounded if value >= 0 else -rounded
+
+
+def truncate_fixed(value: int, precision: int) -> int:
+    # value truncated toward zero to precision decimals, like int(x * 10**precision) / 10**precision
+    if precision >= DECIMALS:
+        return value
+    step = 10 ** (DECIMALS - precision)
+    truncated = abs(value) // step * step
+    return truncated if value >= 0 else -truncated
+
+
+def format_fixed(value: int, precision: int = DECIMALS) -> str:
+    # shortest decimal string with at most precision decimals, like 50.9 or 4.0
+    value = round_fixed(value, precision)
+    units, fraction = divmod(abs(value), SCALE)
+    fraction = f"{fraction:0{DECIMALS}d}"[:precision].rstrip("0") or "0"
+    return f"{'-' if value < 0 else ''}{units}.{fraction}"
@@ -1,14 +1,27 @@
 import os
-import sys
-import argparse
+import logging
 from datetime import datetime
 from math import sin, cos, sqrt, atan2, radians
-import xml.etree.ElementTree as ET
+
+from lstio import Output, MemoryOutput, OUTPUT_MODES, FILE, STDOUT, BOTH, echo, find_input, open_input
+from fixedpoint import DECIMALS, to_fixed, to_float, format_fixed
+from snapping import VertexGraph
+from tiling import bbox, union, partition
 
 NAME = "LST File Python Generator"
-VERSION = "1.0.0"
+VERSION = "1.1.1"
 # CHANGELOG
 #
+# 2026-10-19 1.1.1 Fast doc.osm parser engine, ElementTree fallback and cross-check
+# 2026-10-19 1.1.0 Several scenery folders merged into one Objects.lst, with branches across files
+# 2026-10-19 1.0.9 Streamed doc.osm parsing, nodes spilled to disk above a node count
+# 2026-10-19 1.0.8 generate() to produce LST content from doc.osm content in memory
+# 2026-10-19 1.0.7 Optional validation of generated Objects.lst files
+# 2026-10-19 1.0.6 Fixed-point coordinates with output precision, compressed doc.osm, files only replaced when changed
+# 2026-10-19 1.0.5 Buffered output to file, stdout or both, diagnostics on logger, quiet mode
+# 2026-10-19 1.0.4 Optional geographic tiling of output
+# 2026-10-19 1.0.3 Node snapping in meters into shared vertices, branch lookup on vertex graph
+# 2026-10-19 1.0.2 Faster start up, XML parser only loaded when needed
 # 2024-11-10 1.0.1 More warnings upon detected inconsistencies
 # 2024-11-10 1.0.0 Initial version
 #
@@ -21,18 +34,20 @@ SOURCE_FILE = "doc.osm"
 DEFAULT_SPEED = 10
 DEFAULT_CHANCE = 0.5
 COMMAND_SEPARATOR = ";"
+NEWLINE = "\n"
 EARTH_RADIUS = 6373000.0 # Approximate radius of earth in meters
 MAX_DISTANCE = 1.0 # in meters, for proximity between two points
+SPILL_THRESHOLD = 2000000 # nodes kept in memory, more nodes are moved to a disk store
+AUTO = "auto" # fast doc.osm parser, ElementTree if the file is unusual
+FAST = "fast"
+ETREE = "etree"
+ENGINES = [AUTO, FAST, ETREE]
 
 #
 BUFFER = 0.2 # buffer around init.lst bounding box
 ROUND = 4 # decimal part of bounding box
 
-# Command-line arguments
-#
-parser = argparse.ArgumentParser(description="Generate LST files from prepared scenery")
-parser.add_argument("--antimeridian", action="store_true", help="force bounding box around antimeridian")
-parser.add_argument("scenery_folder", metavar="scenery_folder", type=str, nargs="?", help="scenery folder")
+logger = logging.getLogger("LSTGenerator")
 
 #
 # Preferred proximity function
@@ -50,199 +65,482 @@ def distance(lat1, lon1, lat2, lon2) -> float:
 
 def close2(p1, p2) -> bool:
     # not used, but should ;-)
-    return distance(p1["lat"], p1["lon"], p2["lat"], p2["lon"]) < MAX_DISTANCE
+    return distance(to_float(p1["lat"]), to_float(p1["lon"]), to_float(p2["lat"]), to_float(p2["lon"])) < MAX_DISTANCE
 
-# Original proximity function
-MAX_ARC_DEGREE_DIFF = 0.000002 # in lat/lon fraction of degree of arc (0°-360°)
-def close(p1, p2) -> bool:
-    # not really a distance, varies with latitude
-    test = abs(p1["lat"] - p2["lat"]) < MAX_ARC_DEGREE_DIFF and abs(p1["lon"] - p2["lon"]) < MAX_ARC_DEGREE_DIFF
-    if test:
-        close_print(p1, p2)
-    return test
+def bounds(nodes, antimeridian: bool = False) -> tuple:
+    # Init.lst bounding box (north, south, east, west) around nodes, fixed-point
+    # nodes are read once, they may be streamed from a NodeStore
+    buffer = to_fixed(BUFFER)
+    north = to_fixed(-90)
+    south = to_fixed(90)
+    east = to_fixed(-180)
+    west = to_fixed(180)
+    for n in nodes:
+        north = max(north, n.get("lat"))
+        south = min(south, n.get("lat"))
+        east = max(east, n.get("lon"))
+        west = min(west, n.get("lon"))
+    north = north + buffer
+    south = south - buffer
+    east = east + buffer  # not correct over antimeridian
+    west = west - buffer  # not correct over antimeridian
+    if antimeridian:
+        noteast = east
+        east = west
+        west = noteast
+    return (north, south, east, west)
 
-def close_print(p1, p2):
-    print(f"# close {p1['id']} {p2['id']}")
+def write_init(out, source, box, antimeridian: bool = False):
+    (north, south, east, west) = box
+    out.print("0")
+    out.print(format_fixed(north, ROUND))
+    out.print(format_fixed(south, ROUND))
+    out.print(format_fixed(east, ROUND))
+    out.print(format_fixed(west, ROUND))
+    out.print(f"# file {source}")
+    if not antimeridian:
+        out.print("# warning, east and west bounds may have to be inverted around anti-meridian")
+    out.print(f"# generated by {NAME} {VERSION} on {datetime.now().isoformat(timespec='seconds')}")
 
-def dual_print(s, file):
-    # prints both on screen and generate files
-    print(s) # comment out this line to just get the files
-    print(s, file=file)
+def write_objects(out, source, ways, all_nodes, graph, numbering, precision: int = DECIMALS):
+    # numbering maps a way route number to its route number in this file
+    out.print(f"# generated by {NAME} {VERSION} on {datetime.now().isoformat(timespec='seconds')}")
+    out.print(f"# file {source}")
+    for way in ways: # for each polygon we found in the scenery, we build a route
+        write_route(out, way, all_nodes, graph, numbering, precision)
 
-def main():
-    args = parser.parse_args()
-    indir=args.scenery_folder
+def write_route(out, way, all_nodes, graph, numbering, precision: int = DECIMALS):
+    name = way.get("tags").get("name", "unamed")
+    out.print(f"# Route {numbering[way['route']]}  (way id={way.get('id')}; name={name})")
 
-    if indir is None:
-        parser.print_help()
-        sys.exit(1)
-    #
-    # Collects all nodes
-    #
-    tree = ET.parse(os.path.join(indir, SOURCE_FILE))
-    root = tree.getroot()
+    # the route must contain a LST start statement: HIGHWAY, LOOP or TRAIN
+    # in its description field.
+    if (desc := way["tags"].get("description")) is not None:
+        if not (desc.startswith("HIGHWAY") or desc.startswith("LOOP") or desc.startswith("TRAIN")):
+            out.print("# warning route has invalid description, adding empty HIGHWAY command")
+            out.print("HIGHWAY,NULL,-1,-1")
+        else:
+            out.print(NEWLINE.join(desc.split(COMMAND_SEPARATOR)))
+    else:
+        out.print("# warning route has no description")
+        logger.warning(f"way {way.get('id')} ({name}) has no description, route {numbering[way['route']]} has no HIGHWAY, LOOP or TRAIN line")
+        # should we ignore it? continue?
+
+    # Loop through the nodes/points of the route to add them with their properties to the Objects.lst file
+    point_count = 0  # we remember at which point we are, we need to know we are at the last one
+    for node_ref in way["nodes"]:
+        node = all_nodes[node_ref]
+        point_count = point_count + 1
 
-    all_nodes = {node.attrib["id"]: {
-            "id": node.attrib["id"],
-            "lat": float(node.attrib["lat"]),
-            "lon": float(node.attrib["lon"]),
-            "tags": {tag.attrib["k"]: tag.attrib["v"] for tag in node.findall("tag")}
-        } for node in root.findall("node")}
-    print(f"# {len(all_nodes)} nodes")
+        # find last route that starts at that point (same or snapped vertex)
+        branch_at = graph.branch_at(node_ref, way["route"], node["lat"], node["lon"])
+        if branch_at is not None:
+            branch_at = numbering[branch_at]
 
+        # define a branch if we found another route that starts at the current point
+        if branch_at is not None:
+            if point_count == len(way["nodes"]): # is it the last point in way?
+                # note: node_ref == way["nodes"][-1] may be wrong test
+                #       if node_ref used more than once in polygon
+                out.print(f"BRANCH,{branch_at},1")
+            else:
+                out.print(f"BRANCH,{branch_at},0.5")
+
+        # if the user expressed a BRANCHIF/BRANCH on the node, we write it
+        # ERROR: branch_at can be None! (and therefore generate wrong BRANCH/BRACNHIF statement)
+        if (desc := node["tags"].get("description")) is not None:
+            if desc.startswith("BRANCHIF"):
+                cond = None
+                if branch_at is None:
+                    out.print(f"# error: branch statement ({desc}) has no branch")
+                    logger.warning(f"way {way.get('id')} ({name}): {desc} on node {node_ref}, but no route starts there")
+                if "_" in desc:
+                    pos = desc.index("_")
+                    cond = desc[pos+1:]
+                    out.print(f"BRANCHIF,{branch_at},{cond}")
+                elif "," in desc:
+                    pos = desc.index(",")
+                    cond = desc[pos+1:]
+                    out.print(f"BRANCHIF,{branch_at},{cond}")
+                else:
+                    out.print(f"# warning: no _ or , in statement {desc}, no condition")
+            elif desc.startswith("BRANCH"):
+                if branch_at is None:
+                    out.print(f"# error: branch statement ({desc}) has no branch")
+                    logger.warning(f"way {way.get('id')} ({name}): {desc} on node {node_ref}, but no route starts there")
+                chance = DEFAULT_CHANCE
+                if "_" in desc:
+                    pos = desc.index("_")
+                    chance = desc[pos+1:]
+                elif "," in desc:
+                    pos = desc.index(",")
+                    chance = desc[pos+1:]
+                else:
+                    out.print(f"# warning: no _ or , in statement {desc}, no chance")
+                try:
+                    chance = float(chance)
+                except TypeError:
+                    chance = DEFAULT_CHANCE
+                    out.print(f"# warning: chance {chance} not a number, forcing to {chance}")
+                if chance > 2:
+                    chance = chance / 100
+                out.print(f"BRANCH,{branch_at},{round(chance, 2)}")
+            else:
+                out.print(NEWLINE.join(desc.split(COMMAND_SEPARATOR)))
+
+        # finally, we write the current node/point with its speed, if any
+        speed = None
+        if (speed_str := node["tags"].get("z_value")) is not None:
+            speed = 10
+            try:
+                speed = float(speed_str)
+            except TypeError:
+                speed = DEFAULT_SPEED
+                out.print(f"# warning: speed {speed_str} not a number, forcing to {speed}")
+        lat = format_fixed(node.get("lat"), precision)
+        lon = format_fixed(node.get("lon"), precision)
+        if speed is not None:
+            out.print(f"WP,{lat},{lon},{speed}")
+        else:
+            out.print(f"WP,{lat},{lon}")
+
+    out.print("")
+
+def tiles(all_ways, all_nodes, graph, size):
+    # Partitions ways into tiles. Ways that branch onto each other stay in the same tile
+    # since a BRANCH can only target a route of the same Objects.lst file.
+    group = {route: route for route in range(len(all_ways))}  # union-find on route numbers
+
+    def find(r):
+        while group[r] != r:
+            group[r] = group[group[r]]
+            r = group[r]
+        return r
+
+    for way in all_ways.values():
+        for node_ref in way["nodes"]:
+            if (node := all_nodes.get(node_ref)) is None:
+                continue
+            if (branch_at := graph.branch_at(node_ref, way["route"], node["lat"], node["lon"])) is not None:
+                group[find(branch_at)] = find(way["route"])
+
+    components = {}
+    for way in all_ways.values():
+        points = [(to_float(all_nodes[n]["lat"]), to_float(all_nodes[n]["lon"])) for n in way["nodes"] if n in all_nodes]
+        if len(points) == 0:
+            continue
+        ways, boxes = components.setdefault(find(way["route"]), ([], []))
+        ways.append(way)
+        boxes.append(bbox(points))
+    return partition([(ways, union(boxes)) for ways, boxes in components.values()], size)
+
+def check_objects(filename) -> int:
+    # Validates a generated Objects.lst file, reports problems on logger, returns number of errors
+    from lstcheck import LSTCheck
+
+    check = LSTCheck(filename)
+    check.check()
+    for lineno, level, message in check.problems:
+        logger.warning(f"{filename}:{lineno}: {level}: {message}")
+    return len(check.errors())
+
+def add_node(all_nodes, node, spill_threshold: int = None):
+    # adds node to table, returns table, a NodeStore once there are more than spill_threshold nodes.
+    # Node tables are dict, or NodeStore (only imported when needed).
+    if not isinstance(all_nodes, dict):
+        all_nodes.add(node)
+        return all_nodes
+    all_nodes[node["id"]] = node
+    if spill_threshold is not None and len(all_nodes) > spill_threshold:
+        from nodestore import NodeStore
+
+        logger.info(f"more than {spill_threshold} nodes, nodes moved to disk")
+        return NodeStore(all_nodes.values())
+    return all_nodes
+
+def etree_elements(source):
+    # yields ("node", node) and ("way", way) dictionaries of doc.osm content, streamed with ElementTree
+    import xml.etree.ElementTree as ET
+
+    root = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+            continue
+        if event != "end":
+            continue
+        if elem.tag == "node":
+            yield ("node", {
+                "id": elem.attrib["id"],
+                "lat": to_fixed(elem.attrib["lat"]),
+                "lon": to_fixed(elem.attrib["lon"]),
+                "tags": {tag.attrib["k"]: tag.attrib["v"] for tag in elem.findall("tag")}
+            })
+        elif elem.tag == "way":
+            yield ("way", {
+                "id": elem.attrib["id"],
+                "nodes": [nd.attrib["ref"] for nd in elem.findall("nd")],
+                "tags": {tag.attrib["k"]: tag.attrib["v"] for tag in elem.findall("tag")}
+            })
+        else:
+            continue
+        root.clear()  # drops parsed elements, memory only holds the tables
+
+def tables(elements, spill_threshold: int = None) -> tuple:
     #
-    # Collects all ways (path, polygons)
+    # Collects all nodes, and all ways (path, polygons)
     # Assign a route number to each route found
     # (numbered from begining of file to end of file)
     #
+    all_nodes = {}
     all_ways = {}
     route = 0
-    for way in root.findall("way"):
-        all_ways[way.attrib["id"]] = {
-            "id": way.attrib["id"],
-            "nodes": [nd.attrib["ref"] for nd in way.findall("nd")],
-            "tags": {tag.attrib["k"]: tag.attrib["v"] for tag in way.findall("tag")},
-            "route": route
-        }
-        route = route + 1
-        # sanity check: are we referencing nodes we don't have?
-        missing = [nd.attrib["ref"] for nd in way.findall("nd") if nd.attrib["ref"] not in all_nodes]
+    for kind, element in elements:
+        if kind == "node":
+            all_nodes = add_node(all_nodes, element, spill_threshold)
+        else:
+            element["route"] = route
+            all_ways[element["id"]] = element
+            route = route + 1
+    logger.info(f"{len(all_nodes)} nodes")
+
+    # sanity check: are we referencing nodes we don't have?
+    for way in all_ways.values():
+        missing = [ref for ref in way["nodes"] if ref not in all_nodes]
         if len(missing) > 0:
-            print(f"referenced nodes {missing} missing?")
-    print(f"# {len(all_ways)} ways (route #0 to #{len(all_ways)-1})")
+            logger.warning(f"referenced nodes {missing} missing?")
+    logger.info(f"{len(all_ways)} ways (route #0 to #{len(all_ways)-1})")
+    return all_nodes, all_ways
 
+def osm_bytes(source, read: bool = False):
+    # content of source for the fast engine: bytes, or a read-only mmap of plain files.
+    # Other streams (like decompressed files) are only read in memory if read is True, None otherwise.
+    # File names are opened with lstio, so compressed files are decompressed.
+    import io
+    import mmap
+
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, str):
+        if source.lstrip().startswith("<"):
+            return source.encode("utf-8")
+        with open_input(find_input(source), "rb") as fp:
+            return osm_bytes(fp, read)
+    if isinstance(source, io.BufferedReader):
+        try:
+            return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # empty file, or not a regular file
+            pass
+    if read:
+        data = source.read()
+        return data.encode("utf-8") if isinstance(data, str) else data
+    return None
+
+def parse(source, spill_threshold: int = None, engine: str = AUTO) -> tuple:
+    # Returns (all_nodes, all_ways) of WED doc.osm content.
+    # source is a file name, possibly of a compressed file, an opened file-like object, or OSM XML text or bytes.
+    # Past spill_threshold nodes, nodes are moved to a NodeStore on disk and all_nodes is that store.
+    # The fast engine scans the file bytes, memory-mapped when possible, and parsing starts again
+    # with ElementTree on anything unusual. ElementTree streams the file.
+    import io
+    import mmap
+    from osmscan import elements, ScanError
+
+    if isinstance(source, str) and not source.lstrip().startswith("<"):
+        with open_input(find_input(source), "rb") as fp:
+            return parse(fp, spill_threshold, engine)
+    if engine != ETREE and (data := osm_bytes(source, read=engine == FAST)) is not None:
+        try:
+            return tables(elements(data), spill_threshold)
+        except ScanError as e:
+            if engine == FAST:
+                raise
+            logger.info(f"fast parser stopped ({e}), parsing with ElementTree")
+            if isinstance(data, mmap.mmap):
+                data.seek(0)
+                source = data
+            else:
+                source = io.BytesIO(data)
+            return tables(etree_elements(source), spill_threshold)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif isinstance(source, str):
+        source = io.StringIO(source)
+    return tables(etree_elements(source), spill_threshold)
+
+def cross_check(filename: str) -> list:
+    # Parses filename with both engines and returns differences between their node and way tables, empty if none
+    from osmscan import ScanError
+
+    with open_input(filename, "rb") as fp:
+        expected = parse(fp, engine=ETREE)
+    try:
+        with open_input(filename, "rb") as fp:
+            found = parse(fp, engine=FAST)
+    except ScanError as e:
+        return [f"fast engine cannot parse file: {e}"]
+    differences = []
+    for name, etree_table, fast_table in zip(["node", "way"], expected, found):
+        if list(etree_table.keys()) != list(fast_table.keys()):
+            differences.append(f"{name} ids differ: {len(etree_table)} with ElementTree, {len(fast_table)} with fast engine")
+            continue
+        for key, element in etree_table.items():
+            if fast_table[key] != element:
+                differences.append(f"{name} {key} differs: {element} with ElementTree, {fast_table[key]} with fast engine")
+    return differences
+
+def parse_file(filename: str, spill_threshold: int = None, engine: str = AUTO) -> tuple:
+    with open_input(filename, "rb") as fp:
+        return parse(fp, spill_threshold, engine)
+
+def merge(parsed: list, spill_threshold: int = None) -> tuple:
+    # Merges (all_nodes, all_ways) of several files into one node and way space.
+    # Node and way ids are prefixed with the file number, like 0:-12, routes are numbered
+    # in file order then in way order, so they only change if files before change.
+    if len(parsed) == 1:
+        return parsed[0]
+    all_nodes = {}
+    all_ways = {}
+    route = 0
+    for i, (nodes, ways) in enumerate(parsed):
+        for node in nodes.values():
+            node["id"] = f"{i}:{node['id']}"
+            all_nodes = add_node(all_nodes, node, spill_threshold)
+        for way in ways.values():
+            way["id"] = f"{i}:{way['id']}"
+            way["nodes"] = [f"{i}:{n}" for n in way["nodes"]]
+            way["route"] = route
+            all_ways[way["id"]] = way
+            route = route + 1
+        if not isinstance(nodes, dict):  # NodeStore
+            nodes.close()
+    logger.info(f"{len(all_nodes)} nodes, {len(all_ways)} ways (route #0 to #{len(all_ways)-1}) in {len(parsed)} files")
+    return all_nodes, all_ways
+
+def snap(all_ways, all_nodes, tolerance: float = MAX_DISTANCE) -> VertexGraph:
     #
-    # Init.lst
+    # Snaps near-coincident nodes of all ways into shared vertices
+    # and records which routes go through/start at each vertex.
+    # Nodes on disk are too many to all be indexed, only way start nodes are,
+    # other nodes are located when writing routes.
     #
-    north = max([-90] + [float(n.get("lat")) for n in all_nodes.values()]) + BUFFER
-    south = min([90] + [float(n.get("lat")) for n in all_nodes.values()]) - BUFFER
-    east = max([-180] + [float(n.get("lon")) for n in all_nodes.values()]) + BUFFER  # not correct over antimeridian
-    west = min([180] + [float(n.get("lon")) for n in all_nodes.values()]) - BUFFER  # not correct over antimeridian
-    if args.antimeridian:
-        noteast = east
-        east = west
-        west = noteast
+    starts_only = not isinstance(all_nodes, dict)  # NodeStore
+    graph = VertexGraph(tolerance=tolerance, starts_only=starts_only)
+    for way in all_ways.values():
+        for node_ref in way["nodes"][:1] if starts_only else way["nodes"]:
+            if (node := all_nodes.get(node_ref)) is not None:
+                graph.add_node(node_ref, node["lat"], node["lon"])
+    for way in all_ways.values():
+        graph.add_way(way["route"], way["nodes"])
+    logger.info(f"{graph.merged} nodes snapped, {len(graph)} shared vertices")
+    return graph
 
-    # with open("Init.lst", "w") as fp
-    print("############ Init.lst")
-    with open(f"Init{DEBUG_EXTENSION}.lst", "w") as fp:
-        dual_print("0", file=fp)
-        dual_print(f"{round(north, ROUND)}", file=fp)
-        dual_print(f"{round(south, ROUND)}", file=fp)
-        dual_print(f"{round(east, ROUND)}", file=fp)
-        dual_print(f"{round(west, ROUND)}", file=fp)
-        dual_print(f"# file {os.path.abspath(indir)}", file=fp)
-        if not args.antimeridian:
-            dual_print("# warning, east and west bounds may have to be inverted around anti-meridian", file=fp)
-        dual_print(f"# generated by {NAME} {VERSION} on {datetime.now().isoformat(timespec='seconds')}", file=fp)
-    #
-    # Objects.lst
+def generate(source, init=None, objects=None, name: str = "memory", antimeridian: bool = False, tolerance: float = MAX_DISTANCE, precision: int = DECIMALS, spill_threshold: int = None, engine: str = AUTO):
+    # Generates Init.lst and Objects.lst content from doc.osm content, without file.
+    # source is as in parse(), or a list of them merged into one Objects.lst. init and objects are sinks with a print() method (lstio.Output, lstio.MemoryOutput...).
+    # If they are not given, content is returned as (init, objects) strings, otherwise it is streamed to them.
+    sources = source if isinstance(source, list) else [source]
+    all_nodes, all_ways = merge([parse(s, spill_threshold, engine) for s in sources], spill_threshold)
+    graph = snap(all_ways, all_nodes, tolerance)
+    init_out = init if init is not None else MemoryOutput()
+    objects_out = objects if objects is not None else MemoryOutput()
+    write_init(init_out, name, bounds(all_nodes.values(), antimeridian), antimeridian)
+    write_objects(objects_out, name, all_ways.values(), all_nodes, graph, {r: r for r in range(len(all_ways))}, precision)
+    if init is None and objects is None:
+        return (init_out.getvalue(), objects_out.getvalue())
+    return None
+
+def main():
+    import sys
+    import argparse
+
+    # Command-line arguments
     #
-    print("")
-    print("############ Objects.lst")
-    with open(f"Objects{DEBUG_EXTENSION}.lst", "w") as fp:
-        dual_print(f"# generated by {NAME} {VERSION} on {datetime.now().isoformat(timespec='seconds')}", file=fp)
-        dual_print(f"# file {os.path.abspath(indir)}", file=fp)
-        for way in all_ways.values(): # for each polygon we found in the scenery, we build a route
-            name = way.get("tags").get("name", "unamed")
-            dual_print(f"# Route {way.get('route')}  (way id={way.get('id')}; name={name})", file=fp)
-
-            # the route must contain a LST start statement: HIGHWAY, LOOP or TRAIN
-            # in its description field.
-            if (desc := way["tags"].get("description")) is not None:
-                if not (desc.startswith("HIGHWAY") or desc.startswith("LOOP") or desc.startswith("TRAIN")):
-                    dual_print("# warning route has invalid description, adding empty HIGHWAY command", file=fp)
-                    dual_print("HIGHWAY,NULL,-1,-1", file=fp)
-                else:
-                    dual_print(f"{'\n'.join(desc.split(COMMAND_SEPARATOR))}", file=fp)
-            else:
-                dual_print("# warning route has no description", file=fp)
-                # should we ignore it? continue?
-
-            # Loop through the nodes/points of the route to add them with their properties to the Objects.lst file
-            point_count = 0  # we remember at which point we are, we need to know we are at the last one
-            for node_ref in way["nodes"]:
-                node = all_nodes[node_ref]
-                point_count = point_count + 1
-
-                # find last route that starts at that point
-                branch_at = None
-                for way2 in all_ways.values():
-                    if way2 == way: # same route, we skip it
-                        continue
-                    # we get the starting point of that route
-                    start_ref2 = way2.get("nodes")[0]
-                    start_node2 = all_nodes[start_ref2]
-                    # if the starting point of the route close to the point of this route?
-                    if (node["id"] != start_node2["id"]) and close(node, start_node2):
-                        branch_at = way2["route"]
-                    # note: since we loop over all routes and do not stop as soon as one if found,
-                    #       only the *last* route that starts at the current node is kept.
-
-                # define a branch if we found another route that starts at the current point
-                if branch_at is not None:
-                    if point_count == len(way["nodes"]): # is it the last point in way?
-                        # note: node_ref == way["nodes"][-1] may be wrong test
-                        #       if node_ref used more than once in polygon
-                        dual_print(f"BRANCH,{branch_at},1", file=fp)
-                    else:
-                        dual_print(f"BRANCH,{branch_at},0.5", file=fp)
-
-                # if the user expressed a BRANCHIF/BRANCH on the node, we write it
-                # ERROR: branch_at can be None! (and therefore generate wrong BRANCH/BRACNHIF statement)
-                if (desc := node["tags"].get("description")) is not None:
-                    if desc.startswith("BRANCHIF"):
-                        cond = None
-                        if branch_at is None:
-                            dual_print(f"# error: branch statement ({desc}) has no branch", file=fp)
-                        if "_" in desc:
-                            pos = desc.index("_")
-                            cond = desc[pos+1:]
-                            dual_print(f"BRANCHIF,{branch_at},{cond}", file=fp)
-                        elif "," in desc:
-                            pos = desc.index(",")
-                            cond = desc[pos+1:]
-                            dual_print(f"BRANCHIF,{branch_at},{cond}", file=fp)
-                        else:
-                            dual_print(f"# warning: no _ or , in statement {desc}, no condition", file=fp)
-                    elif desc.startswith("BRANCH"):
-                        if branch_at is None:
-                            dual_print(f"# error: branch statement ({desc}) has no branch", file=fp)
-                        chance = DEFAULT_CHANCE
-                        if "_" in desc:
-                            pos = desc.index("_")
-                            chance = desc[pos+1:]
-                        elif "," in desc:
-                            pos = desc.index(",")
-                            chance = desc[pos+1:]
-                        else:
-                            dual_print(f"# warning: no _ or , in statement {desc}, no chance", file=fp)
-                        try:
-                            chance = float(chance)
-                        except TypeError:
-                            chance = DEFAULT_CHANCE
-                            dual_print(f"# warning: chance {chance} not a number, forcing to {chance}", file=fp)
-                        if chance > 2:
-                            chance = chance / 100
-                        dual_print(f"BRANCH,{branch_at},{round(chance, 2)}", file=fp)
-                    else:
-                        dual_print(f"{'\n'.join(desc.split(COMMAND_SEPARATOR))}", file=fp)
-
-                # finally, we write the current node/point with its speed, if any
-                speed = None
-                if (speed_str := node["tags"].get("z_value")) is not None:
-                    speed = 10
-                    try:
-                        speed = float(speed_str)
-                    except TypeError:
-                        speed = DEFAULT_SPEED
-                        dual_print(f"# warning: speed {speed_str} not a number, forcing to {speed}", file=fp)
-                if speed is not None:
-                    dual_print(f"WP,{node.get('lat')},{node.get('lon')},{speed}", file=fp)
-                else:
-                    dual_print(f"WP,{node.get('lat')},{node.get('lon')}", file=fp)
+    parser = argparse.ArgumentParser(description="Generate LST files from prepared scenery")
+    parser.add_argument("--antimeridian", action="store_true", help="force bounding box around antimeridian")
+    parser.add_argument("--snap", metavar="meters", type=float, default=MAX_DISTANCE, help=f"distance under which nodes are merged (default {MAX_DISTANCE}m)")
+    parser.add_argument("--precision", metavar="decimals", type=int, default=DECIMALS, help=f"decimals of coordinates in Objects.lst (default {DECIMALS})")
+    parser.add_argument("--spill-threshold", metavar="nodes", type=int, default=SPILL_THRESHOLD, help=f"node count above which nodes are kept on disk (default {SPILL_THRESHOLD})")
+    parser.add_argument("--tile", metavar="degrees", type=float, help="partition routes into tiles of that size, each with its own Init/Objects files")
+    parser.add_argument("--output", choices=OUTPUT_MODES, help="where LST content goes (default both, file if quiet)")
+    parser.add_argument("--quiet", action="store_true", help="only report warnings and errors")
+    parser.add_argument("--check", action="store_true", help="validate generated Objects.lst files, exit with 1 on error")
+    parser.add_argument("--engine", choices=ENGINES, default=AUTO, help=f"doc.osm parser, fast falls back to etree if the file is unusual in auto mode only (default {AUTO})")
+    parser.add_argument("--cross-check", action="store_true", help="parse doc.osm files with both engines and report differences, no LST file written")
+    parser.add_argument("--workers", metavar="count", type=int, help="parse doc.osm files of several scenery folders in that many worker processes")
+    parser.add_argument("scenery_folder", metavar="scenery_folder", type=str, nargs="*", help="scenery folders, routes of all folders go into the same files")
+
+    args = parser.parse_args()
+    indirs=args.scenery_folder
+
+    # Diagnostics go to the logger (stderr), LST content to output
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="# %(message)s")
+    mode = args.output
+    if mode is None:
+        mode = FILE if args.quiet else BOTH
+
+    if len(indirs) == 0:
+        parser.print_help()
+        sys.exit(1)
+    filenames = [find_input(os.path.join(indir, SOURCE_FILE)) for indir in indirs]
+    if args.cross_check:
+        differences = 0
+        for fn in filenames:
+            for d in cross_check(fn):
+                logger.warning(f"{fn}: {d}")
+                differences = differences + 1
+        logger.warning(f"{len(filenames)} file(s) cross-checked, {differences} differences")
+        sys.exit(1 if differences > 0 else 0)
+    if args.workers is not None and len(filenames) > 1:
+        # Tables are sent back from workers, nodes are only moved to disk once merged
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            parsed = list(pool.map(parse_file, filenames, [None] * len(filenames), [args.engine] * len(filenames)))
+    else:
+        parsed = [parse_file(fn, args.spill_threshold, args.engine) for fn in filenames]
+    all_nodes, all_ways = merge(parsed, args.spill_threshold)
+    graph = snap(all_ways, all_nodes, args.snap)
+    source = ", ".join(os.path.abspath(indir) for indir in indirs)
+
+    objects_files = []
+    if args.tile is None:
+        echo("############ Init.lst", mode)
+        with Output(f"Init{DEBUG_EXTENSION}.lst", mode) as out:
+            write_init(out, source, bounds(all_nodes.values(), args.antimeridian), args.antimeridian)
+        echo("", mode)
+        echo("############ Objects.lst", mode)
+        with Output(f"Objects{DEBUG_EXTENSION}.lst", mode) as out:
+            write_objects(out, source, all_ways.values(), all_nodes, graph, {r: r for r in range(len(all_ways))}, args.precision)
+        objects_files.append(out.filename)
+
+    # One Init/Objects pair per tile, routes renumbered from 0 in each tile
+    for tile in tiles(all_ways, all_nodes, graph, args.tile) if args.tile is not None else []:
+        ways = sorted([w for group in tile.items for w in group], key=lambda w: w["route"])
+        numbering = {w["route"]: i for i, w in enumerate(ways)}
+        nodes = [all_nodes[n] for w in ways for n in w["nodes"] if n in all_nodes]
+        echo(f"############ Init{DEBUG_EXTENSION}{tile.name()}.lst", mode)
+        with Output(f"Init{DEBUG_EXTENSION}{tile.name()}.lst", mode) as out:
+            write_init(out, source, bounds(nodes, args.antimeridian), args.antimeridian)
+        echo("", mode)
+        echo(f"############ Objects{DEBUG_EXTENSION}{tile.name()}.lst", mode)
+        with Output(f"Objects{DEBUG_EXTENSION}{tile.name()}.lst", mode) as out:
+            write_objects(out, source, ways, all_nodes, graph, numbering, args.precision)
+        objects_files.append(out.filename)
+        echo("", mode)
 
-            dual_print("", file=fp)
+    if args.check:
+        if mode == STDOUT:
+            logger.warning("no file written, nothing checked")
+            return
+        errors = sum(check_objects(fn) for fn in objects_files)
+        logger.info(f"{len(objects_files)} file(s) checked, {errors} errors")
+        if errors > 0:
+            sys.exit(1)
 
 # Run if unwrapped
 if __name__ == "__main__":
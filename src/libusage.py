@@ -0,0 +1,256 @@
+# Reverse index of library object usage
+#
+# Scans GroundTraffic.txt and Objects.lst files (and optionally DSFTool text
+# exports of .dsf files) of many sceneries and records, in an SQLite database,
+# which file uses which library virtual path, and at which line.
+# Scans are incremental: only files whose size or modification time changed
+# are read again, files that disappeared are forgotten.
+# Library exports come from BigLib, so that questions like
+# "which files break if this library is removed" or "which objects are never used"
+# are answered with a query, without scanning anything.
+#
+import logging
+import os
+import sqlite3
+
+from lst2geojson import ROUTE_COMMANDS, read_routes
+from lstio import open_input, input_name
+
+logger = logging.getLogger("LibUsage")
+
+DATABASE = "libusage.sqlite"
+GROUNDTRAFFIC = "groundtraffic"
+OBJECTS = "objects"
+DSF = "dsf"
+DSF_DEFINITIONS = ["OBJECT_DEF", "POLYGON_DEF"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, kind TEXT, size INTEGER, mtime INTEGER);
+CREATE TABLE IF NOT EXISTS uses (file INTEGER, vpath TEXT, lineno INTEGER);
+CREATE TABLE IF NOT EXISTS exports (vpath TEXT, library TEXT);
+CREATE INDEX IF NOT EXISTS uses_vpath ON uses (vpath);
+CREATE INDEX IF NOT EXISTS uses_file ON uses (file);
+CREATE INDEX IF NOT EXISTS exports_vpath ON exports (vpath);
+CREATE INDEX IF NOT EXISTS exports_library ON exports (library);
+"""
+
+
+def file_kind(filename: str, dsf: bool = False) -> str:
+    # kind of file from its name, None if not to be scanned
+    name = os.path.basename(input_name(filename)).lower()
+    if name == "groundtraffic.txt":
+        return GROUNDTRAFFIC
+    if name.startswith("objects") and name.endswith(".lst"):
+        return OBJECTS
+    if dsf and name.endswith(".dsf.txt"):
+        return DSF
+    return None
+
+
+def groundtraffic_uses(lines):
+    # yields (lineno, vpath) of objects in GroundTraffic.txt lines
+    trains = set()
+    block = None  # "train" or "highway" while car lines may follow
+    lineno = 0
+    for line in lines:
+        lineno = lineno + 1
+        line = line.strip()
+        if line == "":
+            block = None
+            continue
+        if line.startswith("#"):
+            continue
+        args = line.split()
+        keyword = args[0].lower()
+        if keyword == "train":
+            trains.add(" ".join(args[1:]))
+            block = "train"
+        elif keyword == "route":
+            block = None
+            name = " ".join(args[4:])
+            if name != "" and name not in trains:
+                yield (lineno, name)
+        elif keyword == "highway":
+            block = "highway"
+        elif block == "train" and len(args) >= 4:
+            yield (lineno, " ".join(args[3:]))
+        elif block == "highway" and len(args) >= 3:
+            yield (lineno, " ".join(args[2:]))
+        elif block == "highway":
+            block = None  # no highway car after first waypoint
+
+
+def objects_uses(lines):
+    # yields (lineno, vpath) of objects in Objects.lst lines
+    for route in read_routes(lines):
+        if route.command in ROUTE_COMMANDS and route.name not in ["", "NULL", "noname"]:
+            yield (route.lineno, route.name)
+        for lineno, args in route.statements:
+            if args[0] == "TRAINCAR" and len(args) > 1:
+                yield (lineno, args[1])
+
+
+def dsf_uses(lines):
+    # yields (lineno, vpath) of definitions in DSFTool text export lines
+    lineno = 0
+    for line in lines:
+        lineno = lineno + 1
+        args = line.split(None, 1)
+        if len(args) == 2 and args[0] in DSF_DEFINITIONS:
+            yield (lineno, args[1].strip())
+
+
+SCANNERS = {GROUNDTRAFFIC: groundtraffic_uses, OBJECTS: objects_uses, DSF: dsf_uses}
+
+
+class LibUsage:
+    """Persistent inverted index from library virtual path to files and lines using it."""
+
+    def __init__(self, database: str = DATABASE):
+        self.database = database
+        self.db = sqlite3.connect(database)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def scan(self, folders: list, dsf: bool = False) -> tuple:
+        # Updates index with files found in folders. Returns (scanned, unchanged, removed, failed) file counts.
+        # Files that cannot be read are logged and left out of the index, they are tried again on next scan.
+        known = {row[1]: row for row in self.db.execute("SELECT id, path, size, mtime FROM files")}
+        seen = set()
+        scanned = 0
+        failed = []
+        for folder in folders:
+            for dirpath, dirnames, filenames in os.walk(folder):
+                for fn in filenames:
+                    path = os.path.abspath(os.path.join(dirpath, fn))
+                    kind = file_kind(path, dsf)
+                    if kind is None:
+                        continue
+                    seen.add(path)
+                    st = os.stat(path)
+                    row = known.get(path)
+                    if row is not None and row[2] == st.st_size and row[3] == st.st_mtime_ns:
+                        continue
+                    try:
+                        self.index_file(path, kind, st, row[0] if row is not None else None)
+                    except Exception as e:  # one unreadable file must not stop the scan of all others
+                        logger.warning(f"{path}: not indexed: {e}")
+                        failed.append(path)
+                        continue
+                    scanned = scanned + 1
+        # forget files that were in scanned folders but are gone
+        roots = [os.path.abspath(f) + os.sep for f in folders]
+        removed = [row[0] for path, row in known.items() if path not in seen and any(path.startswith(r) for r in roots)]
+        forgotten = removed + [known[path][0] for path in failed if path in known]
+        self.db.executemany("DELETE FROM uses WHERE file = ?", [(i,) for i in forgotten])
+        self.db.executemany("DELETE FROM files WHERE id = ?", [(i,) for i in forgotten])
+        self.db.commit()
+        unchanged = len(seen) - scanned - len(failed)
+        logger.info(f"{scanned} files scanned, {unchanged} unchanged, {len(removed)} removed, {len(failed)} failed")
+        return (scanned, unchanged, len(removed), len(failed))
+
+    def index_file(self, path: str, kind: str, st, file_id: int = None):
+        # file is read before the index is changed, so that a read error leaves the index untouched
+        with open_input(path, errors="replace") as fp:
+            uses = [(vpath, lineno) for lineno, vpath in SCANNERS[kind](fp)]
+        if file_id is None:
+            file_id = self.db.execute("INSERT INTO files (path, kind, size, mtime) VALUES (?, ?, ?, ?)", (path, kind, st.st_size, st.st_mtime_ns)).lastrowid
+        else:
+            self.db.execute("UPDATE files SET kind = ?, size = ?, mtime = ? WHERE id = ?", (kind, st.st_size, st.st_mtime_ns, file_id))
+            self.db.execute("DELETE FROM uses WHERE file = ?", (file_id,))
+        self.db.executemany("INSERT INTO uses (file, vpath, lineno) VALUES (?, ?, ?)", [(file_id, vpath, lineno) for vpath, lineno in uses])
+        logger.debug(f"{path}: {len(uses)} objects")
+
+    def set_exports(self, biglib):
+        # replaces library exports with those of a BigLib
+        self.db.execute("DELETE FROM exports")
+        self.db.executemany(
+            "INSERT INTO exports (vpath, library) VALUES (?, ?)",
+            ((vpath, folder) for vpath in biglib.objects for folder, relpath, libname in biglib.files(vpath)),
+        )
+        self.db.commit()
+
+    def libraries(self, library: str) -> list:
+        # library folders matching a folder path or a folder name
+        rows = self.db.execute("SELECT DISTINCT library FROM exports")
+        return [r[0] for r in rows if r[0] == library or os.path.basename(r[0]) == library]
+
+    def uses(self, vpath: str) -> list:
+        # [(path, lineno)] of files using vpath
+        return self.db.execute(
+            "SELECT f.path, u.lineno FROM uses u JOIN files f ON f.id = u.file WHERE u.vpath = ? ORDER BY f.path, u.lineno", (vpath,)
+        ).fetchall()
+
+    def breaks(self, library: str) -> list:
+        # [(path, lineno, vpath)] of uses of objects only exported by library
+        folders = self.libraries(library)
+        if len(folders) == 0:
+            logger.warning(f"library {library} not found")
+            return []
+        marks = ",".join("?" * len(folders))
+        return self.db.execute(
+            f"""SELECT f.path, u.lineno, u.vpath FROM uses u JOIN files f ON f.id = u.file
+            WHERE u.vpath IN (SELECT vpath FROM exports WHERE library IN ({marks}))
+            AND u.vpath NOT IN (SELECT vpath FROM exports WHERE library NOT IN ({marks}))
+            ORDER BY f.path, u.lineno""",
+            folders + folders,
+        ).fetchall()
+
+    def unused(self) -> list:
+        # [(vpath, library)] of exports used by no indexed file
+        return self.db.execute(
+            "SELECT vpath, library FROM exports WHERE vpath NOT IN (SELECT vpath FROM uses) ORDER BY library, vpath"
+        ).fetchall()
+
+
+def main():
+    import sys
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Index and query library object usage of LST and GroundTraffic files")
+    parser.add_argument("--db", metavar="database", type=str, default=DATABASE, help=f"index database (default {DATABASE})")
+    parser.add_argument("--scan", metavar="folder", type=str, action="append", help="scan GroundTraffic.txt and Objects.lst files in folder, can be repeated")
+    parser.add_argument("--dsf", action="store_true", help="also scan DSFTool text exports (*.dsf.txt)")
+    parser.add_argument("--xplane", metavar="xplane_root_path", type=str, help="X-Plane Home Directory, to refresh library exports")
+    parser.add_argument("--library-cache", metavar="cache_file", type=str, help="cache file of X-Plane library index, rebuilt when libraries change")
+    parser.add_argument("--uses", metavar="vpath", type=str, help="list files using library object")
+    parser.add_argument("--breaks", metavar="library", type=str, help="list uses of objects only exported by library (folder path or name)")
+    parser.add_argument("--unused", action="store_true", help="list library objects used by no indexed file")
+
+    args = parser.parse_args()
+    if args.scan is None and args.xplane is None and args.uses is None and args.breaks is None and not args.unused:
+        parser.print_help()
+        sys.exit(1)
+
+    with LibUsage(args.db) as usage:
+        if args.scan is not None:
+            usage.scan(args.scan, dsf=args.dsf)
+        if args.xplane is not None:
+            from biglib import BigLib
+
+            usage.set_exports(BigLib(args.xplane, cache=args.library_cache))
+        if args.uses is not None:
+            for path, lineno in usage.uses(args.uses):
+                print(f"{path}:{lineno}")
+        if args.breaks is not None:
+            for path, lineno, vpath in usage.breaks(args.breaks):
+                print(f"{path}:{lineno}: {vpath}")
+        if args.unused:
+            for vpath, library in usage.unused():
+                print(f"{library}: {vpath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,239 @@
-import sys
+import logging
 import os
-import json
-import argparse
+
+from lstio import open_input, is_compressed, input_name
+from tiling import intersects
+
+logger = logging.getLogger("LSTGeoJSON")
+
+
+ROUTE_COMMANDS = ["LOOP", "TRAIN", "HIGHWAY"]
+
+
+def number(value: str, lineno: int, what: str) -> float:
+    # value as float, None with a warning if it is not a number, so that one bad line does not stop reading
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"line {lineno}: {what} {value!r} not a number, ignored")
+        return None
+
+
+class LSTRoute:
+    # One LOOP, TRAIN or HIGHWAY block of an Objects.lst file,
+    # from its start command to the next empty line.
+    #
+    def __init__(self, number: int, args: list, lineno: int):
+        self.number = number  # route number, routes are numbered from 0 in file order
+        self.command = args[0]
+        self.args = args
+        self.name = args[1] if len(args) > 1 else "noname"
+        self.lineno = lineno
+        self.cars = []  # TRAINCAR objects
+        self.statements = []  # (lineno, args) of all statements in route, after start command
+        self.coords = []  # [lon, lat] of each WP
+        self.speeds = []  # speed at each WP, None if not given
+        self.waits = []  # seconds waited at each WP
+
+    def kind(self) -> str:
+        return "highway" if self.command == "HIGHWAY" else "train"
+
+    def add(self, args: list, lineno: int):
+        self.statements.append((lineno, args))
+        if args[0] == "WP":
+            if len(args) > 2:
+                lat = number(args[1], lineno, "WP latitude")
+                lon = number(args[2], lineno, "WP longitude")
+                if lat is None or lon is None:
+                    return
+                self.coords.append([lon, lat])
+                self.speeds.append(number(args[3], lineno, "WP speed") if len(args) > 3 and args[3] != "" else None)
+                self.waits.append(0.0)
+        elif args[0] == "WAIT":
+            if len(self.waits) > 0 and len(args) > 1 and (wait := number(args[1], lineno, "WAIT")) is not None:
+                self.waits[-1] = self.waits[-1] + wait
+        elif args[0] == "TRAINCAR":
+            self.cars.append(args[1] if len(args) > 1 else "noname")
+
+    def feature(self, filename: str) -> dict:
+        return {
+            "type": "Feature",
+            "properties": {
+                "filename": filename,
+                "lineno": self.lineno,
+                "type": self.kind(),
+                "name": self.name
+            },
+            "geometry": {
+                "type": "LineString",
+                "coordinates": self.coords
+            }
+        }
+
+
+def block_box(lines) -> tuple:
+    # (north, south, east, west) of WPs in (lineno, line) lines, None if no WP.
+    # Only latitude and longitude of WPs are parsed, invalid ones are skipped (LSTRoute.add() warns about them).
+    lats = []
+    lons = []
+    for lineno, line in lines:
+        if line.startswith("WP,"):
+            args = line.split(",", 3)
+            if len(args) > 2:
+                try:
+                    lat, lon = float(args[1]), float(args[2])
+                except ValueError:
+                    continue
+                lats.append(lat)
+                lons.append(lon)
+    if len(lats) == 0:
+        return None
+    return (max(lats), min(lats), max(lons), min(lons))
+
+
+def read_routes(fp, lineno: int = 0, number: int = 0, box: tuple = None):
+    # Yields routes found in lines of fp, an opened file or any iterable of lines.
+    # lineno and number are those of the line and route before the first line read.
+    # If box (north, south, east, west) is given, only routes with a WP bounding box
+    # intersecting it are yielded. Other routes are dropped before their statements are parsed.
+    start = None
+    lines = []
+
+    def make_route():
+        if box is not None:
+            route_box = block_box(lines)
+            if route_box is None or not intersects(box, route_box):
+                return None
+        route = LSTRoute(number=number, args=start[1], lineno=start[0])
+        for l in lines:
+            route.add(l[1].split(","), l[0])
+        return route
+
+    for line in fp:
+        lineno = lineno + 1
+        line = line.strip()
+        if line == "":
+            if start is not None:
+                if (route := make_route()) is not None:
+                    yield route
+                number = number + 1
+                start = None
+            continue
+        if line.startswith("#"):
+            continue
+        if start is not None:
+            lines.append((lineno, line))
+        else:
+            args = line.split(",")
+            if args[0] in ROUTE_COMMANDS:
+                start = (lineno, args)
+                lines = []
+    if start is not None:
+        if (route := make_route()) is not None:
+            yield route
+
+
+def read_init(filename: str) -> tuple:
+    # Returns (north, south, east, west) bounding box of an Init.lst file.
+    # First value is debug flag, then bounds, comments are skipped.
+    values = []
+    with open_input(filename) as fp:
+        for line in fp:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            values.append(line)
+            if len(values) == 5:
+                break
+    if len(values) < 5:
+        raise ValueError(f"{filename}: no bounding box found")
+    return tuple(float(v) for v in values[1:5])
+
+
+def to_geojson(source, box: tuple = None, filename: str = "memory") -> dict:
+    # GeoJSON FeatureCollection of routes of Objects.lst content, without file.
+    # source is text or any iterable of lines like an opened file-like object.
+    lines = source.splitlines() if isinstance(source, str) else source
+    return {
+        "type": "FeatureCollection",
+        "features": [r.feature(filename) for r in read_routes(lines, box=box)]
+    }
 
 
-# @todo: add reading of init.lst and read bounding box
-#
 class LSTGeoJSON:
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, box: tuple = None, numbers: list = None, use_index: bool = False):
         self.filename = filename
+        self.box = box  # (north, south, east, west), only routes intersecting it are converted
+        self.numbers = numbers  # only routes with these numbers are converted
+        self.use_index = use_index or numbers is not None  # seek routes through sidecar route index
 
     def init(self):
         pass
 
-    def convert(self):
-        def get_line(file_pointer):
-            line = file_pointer.readline()
-            if line == "":
-                return None
-            return line.strip()
-
-        features = []
-        scan_ok = False
-        line = None
-        line_num = 0
-
-        fp = open(self.filename, "r")
-        line = get_line(fp)
-        line_num = line_num + 1
+    def routes(self):
+        if self.use_index and is_compressed(self.filename):
+            logger.warning(f"{self.filename}: compressed file cannot be indexed, reading all routes")
+            numbers = None if self.numbers is None else set(self.numbers)
+            with open_input(self.filename) as fp:
+                for route in read_routes(fp, box=self.box):
+                    if numbers is None or route.number in numbers:
+                        yield route
+            return
+        if self.use_index:
+            from lstindex import RouteIndex
 
-        while line is not None and line_num < 1000:
-            args = line.split(",")
-            latest_name = "noname"
-
-            if line.startswith("LOOP"):
-                latest_cmd = "train"
-                latest_startline = line_num
-                scan_ok = True
-
-            elif line.startswith("TRAIN"):
-                latest_cmd = "train"
-                latest_name = args[1]
-                latest_startline = line_num
-                scan_ok = True
-
-            elif line.startswith("HIGHWAY"):
-                latest_cmd = "highway"
-                latest_name = args[1]
-                latest_startline = line_num
-                scan_ok = True
-
-            if scan_ok:
-                curr_coords = []
-                line = get_line(fp)
-                line_num = line_num + 1
-                while line is not None and line != "":
-                    if line.startswith("WP,"):
-                        args = line.split(",")
-                        if len(args) > 3:
-                            curr_coords.append([float(args[2]), float(args[1])])
-                    line = get_line(fp)
-                    line_num = line_num + 1
-
-                scan_ok = False
-
-                features.append({
-                    "type": "Feature",
-                    "properties": {
-                        "filename": self.filename,
-                        "lineno": latest_startline,
-                        "type": latest_cmd,
-                        "name": latest_name
-                    },
-                    "geometry": {
-                        "type": "LineString",
-                        "coordinates": curr_coords
-                    }
-                })
-
-            else:
-                pass
-
-            line = get_line(fp)
-            line_num = line_num + 1
-
-        fp.close()
+            yield from RouteIndex.open(self.filename).routes(numbers=self.numbers, box=self.box)
+            return
+        with open_input(self.filename) as fp:
+            yield from read_routes(fp, box=self.box)
 
+    def convert(self):
         return {
             "type": "FeatureCollection",
-            "features": features
+            "features": [r.feature(self.filename) for r in self.routes()]
         }
 
     def print(self):
+        import json
+
         print(json.dumps(self.convert(), indent=2))
 
     def save(self, root = None):
+        import json
+
         if root is None:
-            fn = self.filename.replace(".lst", "").replace(".LST", "")
+            fn = input_name(self.filename).replace(".lst", "").replace(".LST", "")
             args = os.path.split(fn)
             root = args[1]
         with open(os.path.join(args[0], root+".geojson"), "w") as fp:
             fp.write(json.dumps(self.convert(), indent=2))
         print(f"{root+'.geojson'} created")
 
+    def save_packed(self, root = None):
+        # Saves features in packed binary format with spatial index, see lstpack
+        from lstpack import write_packed
+
+        fn = input_name(self.filename).replace(".lst", "").replace(".LST", "")
+        args = os.path.split(fn)
+        if root is None:
+            root = args[1]
+        write_packed(os.path.join(args[0], root+".lstpack"), self.convert()["features"])
+        print(f"{root+'.lstpack'} created")
+
 
 def main():
+    import sys
+    import argparse
+
     # Command-line arguments
     #
     parser = argparse.ArgumentParser(description="Convert LST Objects.lst file to GeoJSON features")
+    parser.add_argument("--bbox", metavar=("north", "south", "east", "west"), type=float, nargs=4, help="only convert routes intersecting bounding box")
+    parser.add_argument("--init", metavar="init_file", type=str, help="only convert routes intersecting bounding box of LST Init.lst file")
+    parser.add_argument("--route", metavar="number", type=int, action="append", help="only convert route with that number, can be repeated")
+    parser.add_argument("--index", action="store_true", help="use sidecar route index (objects_file.idx), created if missing or out of date")
+    parser.add_argument("--packed", action="store_true", help="save in packed binary format with spatial index instead of GeoJSON")
     parser.add_argument("objects_file", metavar="objects_file", type=str, nargs="?", default="Objects.lst", help="LST Objects.lst file to convert")
 
     args = parser.parse_args()
@@ -118,14 +243,23 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    gt = LSTGeoJSON(fn)
+    box = None
+    if args.bbox is not None:
+        box = tuple(args.bbox)
+    elif args.init is not None:
+        box = read_init(args.init)
+
+    gt = LSTGeoJSON(fn, box=box, numbers=args.route, use_index=args.index)
 
     # To view transformation on terminal, uses:
     # gt.print()
     #
 
     # To save in init-filename.lst and objects-filename.txt use
-    gt.save()
+    if args.packed:
+        gt.save_packed()
+    else:
+        gt.save()
     #
 
     # To save in init.lst and objects.txt use
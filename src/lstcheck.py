@@ -0,0 +1,270 @@
+# One-pass validator for Objects.lst files
+#
+# Reads an Objects.lst file once and reports every problem found with its line number:
+#   - statements outside of a route, unknown statements,
+#   - route start commands without object, routes with less than 2 WP,
+#   - WP, WAIT, BRANCH, BRANCHIF, DREF and DREFOP syntax and values,
+#   - BRANCH and BRANCHIF targets that are not a route of the file (like BRANCH,None),
+#   - duplicate ACTIVEDREF,
+#   - object paths not found in X-Plane libraries or locally, if a BigLib is given.
+# Branch targets are forward references: they are collected during the pass
+# and resolved against the route count at the end, so checking stays linear.
+#
+import logging
+import os
+import re
+
+from lst2geojson import ROUTE_COMMANDS
+from lstio import open_input
+
+logger = logging.getLogger("LSTCheck")
+
+ERROR = "error"
+WARNING = "warning"
+
+GLOBAL_COMMANDS = ["ACTIVEDREF", "DREF", "MINVER", "DREFOP"]  # allowed outside routes
+ROUTE_STATEMENTS = ["WP", "WAIT", "BRANCH", "BRANCHIF", "TRAINCAR", "DREFOP", "REVERSE"]
+NULL = "NULL"
+DATAREF = re.compile(r"^[A-Za-z0-9_\-]+(/[A-Za-z0-9_\-\[\]\.]+)+$")
+
+
+def is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+class LSTCheck:
+    """Validates an Objects.lst file in one pass. Problems are (lineno, level, message)."""
+
+    def __init__(self, filename: str, objects=None):
+        self.filename = filename
+        self.objects = objects  # BigLib, None for no object check
+        self.problems = []
+        self.routes = 0
+        self.branches = []  # (lineno, target) to check against route count
+        self.activedref = []  # line numbers of ACTIVEDREF statements
+        self.checked_objects = {}  # object path: found
+        self.localpath = os.path.dirname(os.path.abspath(filename))  # folder of local objects
+
+    def error(self, lineno: int, message: str):
+        self.problems.append((lineno, ERROR, message))
+
+    def warning(self, lineno: int, message: str):
+        self.problems.append((lineno, WARNING, message))
+
+    def errors(self) -> list:
+        return [p for p in self.problems if p[1] == ERROR]
+
+    def check(self) -> list:
+        with open_input(self.filename, errors="replace") as fp:
+            self.check_lines(fp)
+        return self.problems
+
+    def check_lines(self, lines):
+        route = None  # (lineno, command) of current route
+        wps = 0
+        lineno = 0
+        for line in lines:
+            lineno = lineno + 1
+            line = line.strip()
+            if line == "":
+                if route is not None:
+                    self.end_route(route, wps)
+                    route = None
+                continue
+            if line.startswith("#"):
+                continue
+            args = line.split(",")
+            command = args[0]
+            if route is None:
+                if command in ROUTE_COMMANDS:
+                    route = (lineno, command)
+                    wps = 0
+                    self.start_route(lineno, args)
+                elif command in GLOBAL_COMMANDS:
+                    self.statement(lineno, args)
+                elif command in ROUTE_STATEMENTS:
+                    self.error(lineno, f"{command} outside of a route, missing HIGHWAY, LOOP or TRAIN line?")
+                    self.statement(lineno, args)
+                else:
+                    self.warning(lineno, f"unknown statement {command}")
+                continue
+            if command in ROUTE_COMMANDS:
+                self.error(lineno, f"{command} inside route started line {route[0]}, missing empty line?")
+                self.end_route(route, wps)
+                route = (lineno, command)
+                wps = 0
+                self.start_route(lineno, args)
+                continue
+            if command == "WP":
+                wps = wps + 1
+            elif command == "TRAINCAR" and route[1] != "TRAIN":
+                self.error(lineno, f"TRAINCAR in {route[1]} route")
+            self.statement(lineno, args)
+        if route is not None:
+            self.end_route(route, wps)
+        self.end()
+
+    def start_route(self, lineno: int, args: list):
+        if args[0] == "HIGHWAY" and len(args) == 4 and args[1] == NULL and all(is_number(v) and float(v) < 0 for v in args[2:4]):
+            self.warning(lineno, "HIGHWAY placeholder without object (HIGHWAY,NULL,-1,-1 from generator)")
+        elif len(args) < 2 or args[1] in ["", NULL]:
+            self.error(lineno, f"{args[0]} without object")
+        else:
+            self.check_object(lineno, args[1])
+        if args[0] == "HIGHWAY":
+            if len(args) != 4:
+                self.error(lineno, f"HIGHWAY needs object, low and high spacing, {len(args) - 1} value(s) given")
+            for value in args[2:4]:
+                if not is_number(value):
+                    self.error(lineno, f"HIGHWAY spacing {value} not a number")
+
+    def end_route(self, route: tuple, wps: int):
+        if wps < 2:
+            self.error(route[0], f"{route[1]} route #{self.routes} has {wps} WP, needs at least 2")
+        self.routes = self.routes + 1
+
+    def end(self):
+        for branch_lineno, target in self.branches:
+            if target >= self.routes:
+                self.error(branch_lineno, f"branch to route #{target}, file has {self.routes} routes")
+        for l in self.activedref[1:]:
+            self.warning(l, f"ACTIVEDREF already set line {self.activedref[0]}")
+        self.problems.sort(key=lambda p: p[0])
+
+    def check_object(self, lineno: int, path: str):
+        if self.objects is None:
+            return
+        found = self.checked_objects.get(path)
+        if found is None:
+            found = self.objects.check(path, complain=False, localpath=self.localpath)
+            self.checked_objects[path] = found
+        if not found:
+            self.error(lineno, f"object {path} not found")
+
+    def check_dataref(self, lineno: int, command: str, name: str):
+        if not DATAREF.match(name):
+            self.error(lineno, f"{command} invalid dataref name '{name}'")
+
+    def statement(self, lineno: int, args: list):
+        command = args[0]
+        if command == "WP":
+            if len(args) not in [3, 4]:
+                self.error(lineno, f"WP has {len(args) - 1} values, needs latitude, longitude and optional speed")
+                return
+            if not is_number(args[1]) or not -90 <= float(args[1]) <= 90:
+                self.error(lineno, f"WP invalid latitude {args[1]}")
+            if not is_number(args[2]) or not -180 <= float(args[2]) <= 180:
+                self.error(lineno, f"WP invalid longitude {args[2]}")
+            if len(args) == 4 and not is_number(args[3]):
+                self.error(lineno, f"WP speed {args[3]} not a number")
+        elif command == "WAIT":
+            if len(args) != 2 or not is_number(args[1]) or float(args[1]) < 0:
+                self.error(lineno, "WAIT needs a positive number of seconds")
+        elif command in ["BRANCH", "BRANCHIF"]:
+            if len(args) < 3:
+                self.error(lineno, f"{command} needs a route and a {'chance' if command == 'BRANCH' else 'condition'}")
+                return
+            if args[1] in ["", "None"]:
+                self.error(lineno, f"{command} has no target route (unresolved branch)")
+                return
+            try:
+                target = int(args[1])
+            except ValueError:
+                self.error(lineno, f"{command} target route {args[1]} not a route number")
+                return
+            if target < 0:
+                self.error(lineno, f"{command} target route {target} is negative")
+            self.branches.append((lineno, target))
+            if command == "BRANCH":
+                if not is_number(args[2]):
+                    self.error(lineno, f"BRANCH chance {args[2]} not a number")
+                elif not 0 <= float(args[2]) <= 1:
+                    self.warning(lineno, f"BRANCH chance {args[2]} not between 0 and 1")
+        elif command == "TRAINCAR":
+            if len(args) < 2 or args[1] == "":
+                self.error(lineno, "TRAINCAR without object")
+            else:
+                self.check_object(lineno, args[1])
+            for value in args[2:]:
+                if not is_number(value):
+                    self.error(lineno, f"TRAINCAR value {value} not a number")
+        elif command == "REVERSE":
+            if len(args) > 1:
+                self.warning(lineno, "REVERSE has no argument")
+        elif command == "DREFOP":
+            # DREFOP,dataref,value,duration,condition dataref,condition value
+            if len(args) != 6:
+                self.error(lineno, f"DREFOP has {len(args) - 1} values, needs 5")
+                return
+            if args[1] == "":
+                self.error(lineno, "DREFOP without dataref")
+            for value in [args[2], args[3], args[5]]:
+                if value != NULL and not is_number(value):
+                    self.error(lineno, f"DREFOP value {value} not a number or NULL")
+            if args[4] == "":
+                self.error(lineno, "DREFOP empty condition dataref, use NULL")
+        elif command == "DREF":
+            if len(args) != 3:
+                self.error(lineno, "DREF needs a dataref and a value")
+                return
+            self.check_dataref(lineno, command, args[1])
+            if not is_number(args[2]):
+                self.error(lineno, f"DREF value {args[2]} not a number")
+        elif command == "ACTIVEDREF":
+            if len(args) != 2:
+                self.error(lineno, "ACTIVEDREF needs a dataref")
+                return
+            self.check_dataref(lineno, command, args[1])
+            self.activedref.append(lineno)
+        elif command == "MINVER":
+            if len(args) != 2 or not is_number(args[1]):
+                self.error(lineno, "MINVER needs a version number")
+        else:
+            self.warning(lineno, f"unknown statement {command}")
+
+    def print(self):
+        for lineno, level, message in self.problems:
+            print(f"{self.filename}:{lineno}: {level}: {message}")
+        print(f"{self.filename}: {self.routes} routes, {len(self.errors())} errors, {len(self.problems) - len(self.errors())} warnings")
+
+
+def main():
+    import sys
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Check LST Objects.lst files")
+    parser.add_argument("--xplane", metavar="xplane_root_path", type=str, help="X-Plane Home Directory, to check library objects")
+    parser.add_argument("--library-cache", metavar="cache_file", type=str, help="cache file of X-Plane library index, rebuilt when libraries change")
+    parser.add_argument("objects_file", metavar="objects_file", type=str, nargs="*", default=["Objects.lst"], help="LST Objects.lst files to check")
+
+    args = parser.parse_args()
+
+    objects = None
+    if args.xplane is not None:
+        from biglib import BigLib
+
+        objects = BigLib(args.xplane, cache=args.library_cache)
+
+    errors = 0
+    for fn in args.objects_file:
+        if not os.path.exists(fn):
+            logger.error(f"{fn} not found")
+            errors = errors + 1
+            continue
+        check = LSTCheck(fn, objects=objects)
+        check.check()
+        check.print()
+        errors = errors + len(check.errors())
+    sys.exit(1 if errors > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
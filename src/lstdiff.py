@@ -0,0 +1,189 @@
+# Structural diff between two versions of an Objects.lst file
+#
+# Routes are compared as normalized statements: comments and empty lines are
+# dropped, numbers are rounded to PRECISION decimals and written without
+# trailing zeros, so that "10", "10.0" and "10.00000001" are the same value.
+# Each route gets a hash of its normalized statements. Routes are matched in
+# linear time with dictionaries:
+#   1. identical hash (the route may have moved to another route number),
+#   2. same command, object and first WP (modified route),
+#   3. same route number (modified route).
+# Routes left over are removed from the old file or added in the new one.
+# Statement changes inside modified routes are reported with their line numbers.
+#
+import hashlib
+import logging
+from difflib import SequenceMatcher
+
+from lst2geojson import read_routes
+from lstio import open_input
+
+logger = logging.getLogger("LSTDiff")
+
+PRECISION = 7  # decimals kept for numbers, 7 decimals of degree is about 1cm
+
+
+def normalize_value(value: str) -> str:
+    value = value.strip()
+    if value[:1].isalpha():  # keywords, object and dataref paths
+        return value
+    try:
+        s = f"{float(value):.{PRECISION}f}"
+    except ValueError:
+        return value
+    s = s.rstrip("0").rstrip(".")
+    return "0" if s == "-0" else s
+
+
+def normalize(args: list) -> str:
+    return ",".join(normalize_value(a) for a in args)
+
+
+class RouteDigest:
+    # Normalized statements and hash of one route
+
+    def __init__(self, route):
+        self.number = route.number
+        self.lineno = route.lineno
+        self.command = route.command
+        self.name = route.name
+        self.start = normalize(route.args)
+        self.lines = [normalize(args) for lineno, args in route.statements]
+        self.linenos = [lineno for lineno, args in route.statements]
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.start.encode("utf-8"))
+        for line in self.lines:
+            h.update(b"\n")
+            h.update(line.encode("utf-8"))
+        self.hash = h.hexdigest()
+
+    def key(self) -> tuple:
+        first = next((l for l in self.lines if l.startswith("WP,")), None)
+        return (self.command, self.name, first)
+
+    def label(self) -> str:
+        return f"route #{self.number} (line {self.lineno}) {self.command} {self.name}"
+
+
+def digests(filename: str) -> list:
+    with open_input(filename) as fp:
+        return [RouteDigest(r) for r in read_routes(fp)]
+
+
+class LSTDiff:
+    """Matches routes of two Objects.lst files and reports added, removed, modified and moved routes."""
+
+    def __init__(self, old_filename: str, new_filename: str):
+        self.old_filename = old_filename
+        self.new_filename = new_filename
+        self.old = digests(old_filename)
+        self.new = digests(new_filename)
+        self.unchanged = []  # (old, new)
+        self.moved = []  # (old, new), same content, different route number
+        self.modified = []  # (old, new)
+        self.removed = []  # old
+        self.added = []  # new
+        self.match()
+
+    def match(self):
+        old_left = set(range(len(self.old)))
+        new_left = set(range(len(self.new)))
+
+        def pair(key_of, found: list):
+            keys = {}
+            for i in sorted(old_left, reverse=True):  # so that pop() returns lowest route first
+                keys.setdefault(key_of(self.old[i]), []).append(i)
+            for j in sorted(new_left):
+                candidates = keys.get(key_of(self.new[j]))
+                if candidates:
+                    i = candidates.pop()
+                    old_left.discard(i)
+                    new_left.discard(j)
+                    found.append((self.old[i], self.new[j]))
+
+        same = []
+        pair(lambda d: d.hash, same)
+        for o, n in same:
+            (self.unchanged if o.number == n.number else self.moved).append((o, n))
+        pair(lambda d: d.key(), self.modified)
+        pair(lambda d: d.number, self.modified)
+        self.removed = [self.old[i] for i in sorted(old_left)]
+        self.added = [self.new[j] for j in sorted(new_left)]
+
+    def changed(self) -> bool:
+        return len(self.moved) + len(self.modified) + len(self.removed) + len(self.added) > 0
+
+    @staticmethod
+    def ranges(moved: list) -> list:
+        # [(first, last, shift)] runs of consecutive old route numbers moved by the same shift
+        runs = []
+        for o, n in sorted(moved, key=lambda p: p[0].number):
+            shift = n.number - o.number
+            if len(runs) > 0 and runs[-1][1] == o.number - 1 and runs[-1][2] == shift:
+                runs[-1] = (runs[-1][0], o.number, shift)
+            else:
+                runs.append((o.number, o.number, shift))
+        return runs
+
+    @staticmethod
+    def statements(old: RouteDigest, new: RouteDigest) -> list:
+        # statement changes in a modified route, as printable lines
+        changes = []
+        if old.start != new.start:
+            changes.append(f"  line {old.lineno} -> {new.lineno}: {old.start} -> {new.start}")
+        sm = SequenceMatcher(a=old.lines, b=new.lines, autojunk=False)
+        for op, i1, i2, j1, j2 in sm.get_opcodes():
+            if op == "equal":
+                continue
+            if op == "replace" and i2 - i1 == j2 - j1:
+                for k in range(i2 - i1):
+                    changes.append(f"  line {old.linenos[i1 + k]} -> {new.linenos[j1 + k]}: {old.lines[i1 + k]} -> {new.lines[j1 + k]}")
+                continue
+            for k in range(i1, i2):
+                changes.append(f"  line {old.linenos[k]}: - {old.lines[k]}")
+            for k in range(j1, j2):
+                changes.append(f"  line {new.linenos[k]}: + {new.lines[k]}")
+        return changes
+
+    def print(self, details: bool = True):
+        print(f"--- {self.old_filename} ({len(self.old)} routes)")
+        print(f"+++ {self.new_filename} ({len(self.new)} routes)")
+        for d in self.removed:
+            print(f"removed {d.label()}")
+        for d in self.added:
+            print(f"added {d.label()}")
+        for first, last, shift in LSTDiff.ranges(self.moved):
+            if first == last:
+                print(f"moved route #{first} -> route #{first + shift}")
+            else:
+                print(f"moved routes #{first} to #{last} -> #{first + shift} to #{last + shift}")
+        for o, n in sorted(self.modified, key=lambda p: p[1].number):
+            print(f"modified {o.label()} -> route #{n.number} (line {n.lineno})")
+            if details:
+                for c in LSTDiff.statements(o, n):
+                    print(c)
+        print(
+            f"{len(self.unchanged)} unchanged, {len(self.moved)} moved, {len(self.modified)} modified, {len(self.removed)} removed, {len(self.added)} added"
+        )
+
+
+def main():
+    import sys
+    import argparse
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Compare routes of two LST Objects.lst files")
+    parser.add_argument("--brief", action="store_true", help="do not report statement changes in modified routes")
+    parser.add_argument("old_file", metavar="old_file", type=str, help="old LST Objects.lst file")
+    parser.add_argument("new_file", metavar="new_file", type=str, help="new LST Objects.lst file")
+
+    args = parser.parse_args()
+
+    diff = LSTDiff(args.old_file, args.new_file)
+    diff.print(details=not args.brief)
+    sys.exit(1 if diff.changed() else 0)  # like diff
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Random-access route index over Objects.lst files
+#
+# Records, for each LOOP, TRAIN or HIGHWAY block of an Objects.lst file,
+# its route number, start line number, byte offset and length, WP bounding box
+# and WP count. The index is saved as a JSON sidecar file next to the Objects.lst
+# file (Objects.lst.idx), with size and modification time of the file it indexes,
+# so that tools can seek straight to one route, or to the routes in a bounding box,
+# without parsing the routes before them.
+#
+# Block boundaries are the same as lst2geojson.read_routes(): from a start command
+# to the next empty line.
+#
+import json
+import logging
+import os
+
+from lst2geojson import ROUTE_COMMANDS, read_routes
+from lstio import is_compressed
+from tiling import intersects
+
+logger = logging.getLogger("LSTIndex")
+
+INDEX_EXTENSION = ".idx"
+INDEX_VERSION = 1
+ENCODING = "utf-8"
+
+
+class RouteEntry:
+    def __init__(self, number: int, command: str, name: str, lineno: int, offset: int):
+        self.number = number
+        self.command = command
+        self.name = name
+        self.lineno = lineno  # line number of start command
+        self.offset = offset  # byte offset of start command
+        self.length = 0  # bytes, up to and including the empty line ending the block
+        self.box = None  # (north, south, east, west) of WPs, None if no WP
+        self.count = 0  # number of WPs
+
+    def to_list(self) -> list:
+        return [self.number, self.command, self.name, self.lineno, self.offset, self.length, self.box, self.count]
+
+    @staticmethod
+    def from_list(values: list):
+        e = RouteEntry(*values[0:4], offset=values[4])
+        e.length = values[5]
+        e.box = tuple(values[6]) if values[6] is not None else None
+        e.count = values[7]
+        return e
+
+
+class RouteIndex:
+    """Byte offsets, bounding boxes and WP counts of routes of an Objects.lst file."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.index_filename = filename + INDEX_EXTENSION
+        self.entries = []
+
+    def signature(self) -> list:
+        st = os.stat(self.filename)
+        return [st.st_size, st.st_mtime_ns]
+
+    def build(self):
+        if is_compressed(self.filename):  # offsets would not allow to seek
+            raise ValueError(f"{self.filename}: compressed files cannot be indexed")
+        self.entries = []
+        entry = None
+        lats = []
+        lons = []
+
+        def close(entry, end):
+            entry.length = end - entry.offset
+            entry.count = len(lats)
+            if len(lats) > 0:
+                entry.box = (max(lats), min(lats), max(lons), min(lons))
+            self.entries.append(entry)
+
+        offset = 0
+        lineno = 0
+        with open(self.filename, "rb") as fp:
+            for raw in fp:
+                lineno = lineno + 1
+                start = offset
+                offset = offset + len(raw)
+                line = raw.strip()
+                if line == b"":
+                    if entry is not None:
+                        close(entry, offset)
+                        entry = None
+                    continue
+                if line.startswith(b"#"):
+                    continue
+                if entry is not None:
+                    if line.startswith(b"WP,"):
+                        args = line.split(b",", 3)
+                        if len(args) > 2:
+                            try:
+                                lat, lon = float(args[1]), float(args[2])
+                            except ValueError:
+                                logger.warning(f"{self.filename}:{lineno}: invalid WP position, ignored")
+                                continue
+                            lats.append(lat)
+                            lons.append(lon)
+                    continue
+                args = line.decode(ENCODING, errors="replace").split(",")
+                if args[0] in ROUTE_COMMANDS:
+                    entry = RouteEntry(len(self.entries), args[0], args[1] if len(args) > 1 else "noname", lineno, start)
+                    lats = []
+                    lons = []
+        if entry is not None:
+            close(entry, offset)
+        logger.debug(f"{self.filename}: {len(self.entries)} routes indexed")
+
+    def save(self):
+        with open(self.index_filename, "w") as fp:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "source": os.path.basename(self.filename),
+                    "signature": self.signature(),
+                    "routes": [e.to_list() for e in self.entries],
+                },
+                fp,
+            )
+        logger.debug(f"{self.index_filename} saved")
+
+    def load(self) -> bool:
+        # Loads sidecar index, returns False if there is none or if it is out of date
+        if not os.path.exists(self.index_filename):
+            return False
+        try:
+            with open(self.index_filename, "r") as fp:
+                data = json.load(fp)
+        except ValueError:
+            logger.warning(f"{self.index_filename} unreadable, ignored")
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("signature") != self.signature():
+            logger.debug(f"{self.index_filename} out of date")
+            return False
+        self.entries = [RouteEntry.from_list(r) for r in data.get("routes", [])]
+        return True
+
+    @staticmethod
+    def open(filename: str, save: bool = True):
+        # Returns index of filename, from its sidecar file if up to date, or built (and saved) otherwise
+        idx = RouteIndex(filename)
+        if not idx.load():
+            idx.build()
+            if save:
+                try:
+                    idx.save()
+                except OSError:
+                    logger.warning(f"could not save index {idx.index_filename}")
+        return idx
+
+    def __len__(self):
+        return len(self.entries)
+
+    def select(self, numbers: list = None, box: tuple = None) -> list:
+        # entries with given route numbers, and/or WP bounding box intersecting box
+        entries = self.entries
+        if numbers is not None:
+            entries = [self.entries[n] for n in sorted(set(numbers)) if 0 <= n < len(self.entries)]
+        if box is not None:
+            entries = [e for e in entries if e.box is not None and intersects(box, e.box)]
+        return entries
+
+    def routes(self, numbers: list = None, box: tuple = None):
+        # yields lst2geojson.LSTRoute of selected routes, reading only their bytes
+        with open(self.filename, "rb") as fp:
+            for e in self.select(numbers, box):
+                fp.seek(e.offset)
+                lines = fp.read(e.length).decode(ENCODING, errors="replace").splitlines()
+                yield from read_routes(lines, lineno=e.lineno - 1, number=e.number)
+
+    def route(self, number: int):
+        for r in self.routes([number]):
+            return r
+        return None
+
+
+def main():
+    import sys
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Build route index sidecar file of LST Objects.lst file")
+    parser.add_argument("--list", action="store_true", help="list indexed routes")
+    parser.add_argument("objects_file", metavar="objects_file", type=str, nargs="?", default="Objects.lst", help="LST Objects.lst file to index")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.objects_file):
+        parser.print_help()
+        sys.exit(1)
+
+    idx = RouteIndex(args.objects_file)
+    try:
+        idx.build()
+    except ValueError as e:
+        logger.error(e)
+        sys.exit(1)
+    idx.save()
+    logger.info(f"{idx.index_filename}: {len(idx)} routes")
+    if args.list:
+        for e in idx.entries:
+            print(f"#{e.number} line {e.lineno} {e.command} {e.name}: {e.count} WP, offset {e.offset}, {e.length} bytes, bbox {e.box}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# Input/output helpers shared by LST tools
+#
+# Output files are written to a temporary file next to them, then compared with
+# the existing file, ignoring "# generated by" lines that contain a timestamp.
+# The existing file is only replaced, atomically, when content differs, so that
+# unchanged outputs keep their modification time and readers never see a partial file.
+#
+# Input files may be gzip, xz or bzip2 compressed. Compression is detected from
+# the first bytes of the file, whatever its name, and files are decompressed while read.
+# Compression modules are only imported once a compressed file is found.
+#
+import logging
+import os
+import sys
+from importlib import import_module
+
+logger = logging.getLogger("LSTIO")
+
+BUFFER_SIZE = 1 << 20  # bytes, both for file buffering and for pending lines
+TIMESTAMP_PREFIX = b"# generated by"  # lines ignored when comparing outputs
+
+COMPRESSIONS = [(b"\x1f\x8b", "gzip"), (b"\xfd7zXZ\x00", "lzma"), (b"BZh", "bz2")]  # magic bytes, module
+COMPRESSED_EXTENSIONS = [".gz", ".xz", ".bz2"]
+
+
+def compression(filename: str):
+    # opener of compressed file, None if file is not compressed
+    with open(filename, "rb") as fp:
+        magic = fp.read(6)
+    for prefix, module in COMPRESSIONS:
+        if magic.startswith(prefix):
+            return import_module(module).open
+    return None
+
+
+def is_compressed(filename: str) -> bool:
+    return compression(filename) is not None
+
+
+def open_input(filename: str, mode: str = "r", encoding: str = "utf-8", errors: str = None):
+    # opens filename for reading, decompressing it on the fly if needed. mode is "r" or "rb"
+    opener = compression(filename)
+    if mode == "rb":
+        return open(filename, "rb") if opener is None else opener(filename, "rb")
+    if opener is None:
+        return open(filename, "r", encoding=encoding, errors=errors)
+    return opener(filename, "rt", encoding=encoding, errors=errors)
+
+
+def find_input(filename: str) -> str:
+    # filename, or its compressed version if only that one exists
+    if not os.path.exists(filename):
+        for ext in COMPRESSED_EXTENSIONS:
+            if os.path.exists(filename + ext):
+                return filename + ext
+    return filename
+
+
+def input_name(filename: str) -> str:
+    # filename without compression extension
+    for ext in COMPRESSED_EXTENSIONS:
+        if filename.lower().endswith(ext):
+            return filename[: -len(ext)]
+    return filename
+
+FILE = "file"
+STDOUT = "stdout"
+BOTH = "both"
+OUTPUT_MODES = [FILE, STDOUT, BOTH]
+
+
+def temporary(filename: str) -> str:
+    # new empty temporary file in the folder of filename, so that it can be renamed onto it
+    import tempfile
+
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    fd, path = tempfile.mkstemp(prefix="." + basename + ".", suffix=".tmp", dir=dirname)
+    os.close(fd)
+    return path
+
+
+def same_content(filename: str, other: str) -> bool:
+    # compares two files line by line, ignoring timestamp lines
+    def lines(fp):
+        return (line for line in fp if not line.startswith(TIMESTAMP_PREFIX))
+
+    with open(filename, "rb") as fp1, open(other, "rb") as fp2:
+        sentinel = object()
+        for l1, l2 in zip(lines(fp1), lines(fp2)):
+            if l1 != l2:
+                return False
+        return next(lines(fp1), sentinel) is sentinel and next(lines(fp2), sentinel) is sentinel
+
+
+def replace_if_changed(tmp: str, filename: str) -> bool:
+    # moves tmp onto filename if content differs, removes tmp otherwise. Returns True if filename changed
+    if os.path.exists(filename) and same_content(tmp, filename):
+        os.remove(tmp)
+        return False
+    if os.path.exists(filename):
+        mode = os.stat(filename).st_mode & 0o777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp, mode)
+    os.replace(tmp, filename)
+    return True
+
+
+def write_if_changed(filename: str, content: str) -> bool:
+    # writes content to filename if it differs. Returns True if filename changed
+    tmp = temporary(filename)
+    try:
+        with open(tmp, "w", encoding="utf-8") as fp:
+            fp.write(content)
+    except:
+        os.remove(tmp)
+        raise
+    return replace_if_changed(tmp, filename)
+
+
+class Output:
+    """Sink for LST content lines: a file, stdout, or both.
+
+    Lines are collected and written in large chunks. Diagnostics do not belong here,
+    tools send them to their logger. The file is only replaced on close(), if its content changed.
+    """
+
+    def __init__(self, filename: str, mode: str = BOTH, buffer_size: int = BUFFER_SIZE):
+        self.filename = filename
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.size = 0
+        self.fp = None
+        self.tmp = None
+        self.changed = False  # True if file was replaced on close
+        if mode in [FILE, BOTH]:
+            self.tmp = temporary(filename)
+            self.fp = open(self.tmp, "w", encoding="utf-8", buffering=buffer_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def print(self, s: str = ""):
+        self.pending.append(s)
+        self.size = self.size + len(s) + 1
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+        chunk = "\n".join(self.pending) + "\n"
+        if self.fp is not None:
+            self.fp.write(chunk)
+        if self.mode in [STDOUT, BOTH]:
+            sys.stdout.write(chunk)
+        self.pending = []
+        self.size = 0
+
+    def close(self):
+        self.flush()
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+            self.changed = replace_if_changed(self.tmp, self.filename)
+            logger.info(f"{self.filename} {'written' if self.changed else 'unchanged'}")
+
+    def abort(self):
+        # leaves existing file untouched
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+            os.remove(self.tmp)
+
+
+class MemoryOutput:
+    """Sink for LST content lines kept in memory, or written to an opened text stream.
+
+    Same print() interface as Output, for callers that do not want files.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def print(self, s: str = ""):
+        if self.stream is not None:
+            self.stream.write(s + "\n")
+        else:
+            self.lines.append(s)
+
+    def getvalue(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+    def close(self):
+        pass
+
+
+def echo(s: str, mode: str):
+    # prints a separator or title line on stdout only if mode sends content to stdout
+    if mode in [STDOUT, BOTH]:
+        print(s)
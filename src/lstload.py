@@ -0,0 +1,264 @@
+# Runtime load estimator for LST Objects.lst files
+#
+# Simulates LST traffic offline to predict how many objects a scenery keeps
+# alive at once, before loading it into X-Plane.
+#
+# Model:
+# - LOOP and TRAIN routes have one object (plus one per TRAINCAR) running forever,
+#   going back from the last WP to the first one.
+# - HIGHWAY routes spawn an object every lo to hi seconds (random, seeded),
+#   each object runs the route once and disappears at the last WP.
+# - WP speed (km/h) applies from that WP on, until another speed is given.
+# - WAIT adds its time at the preceding WP. BRANCH/BRANCHIF are not followed.
+#
+# All objects of a route share the same timeline, so positions are computed
+# per route for all its alive objects at once, from the cumulative time at each WP.
+#
+import logging
+from bisect import bisect_left, bisect_right
+from math import cos, floor, radians
+from random import Random
+
+from converter import distance
+from lst2geojson import read_routes
+from lstio import open_input
+
+logger = logging.getLogger("LSTLoad")
+
+DEFAULT_SPEED = 10  # km/h, same as generator
+DURATION = 3600  # seconds simulated
+STEP = 1.0  # seconds between two counts of alive objects
+GRID_STEP = 10.0  # seconds between two positions sampling for grid cells
+CELL_SIZE = 1.0  # km
+KM_PER_DEGREE = 111.2  # along a meridian, approximate
+SEED = 0
+
+
+class RouteTimeline:
+    # Time at which an object reaches each WP of a route
+
+    def __init__(self, route):
+        self.route = route
+        self.objects = 1 + len(route.cars) if route.command == "TRAIN" else 1
+        coords = list(route.coords)
+        speeds = list(route.speeds)
+        waits = list(route.waits)
+        self.closed = route.command != "HIGHWAY"
+        if self.closed and len(coords) > 1:  # go back to start
+            coords.append(coords[0])
+            speeds.append(speeds[0])
+            waits.append(0.0)
+        self.coords = coords
+        # arrival and departure time at each WP
+        self.arrive = []
+        self.depart = []
+        t = 0.0
+        speed = DEFAULT_SPEED
+        for i in range(len(coords)):
+            if i > 0:
+                d = distance(coords[i - 1][1], coords[i - 1][0], coords[i][1], coords[i][0])  # km
+                t = t + d / max(speed, 0.1) * 3600
+            self.arrive.append(t)
+            t = t + waits[i]
+            self.depart.append(t)
+            if speeds[i] is not None:
+                speed = speeds[i]
+        self.duration = t  # dwell time of one object on route, or lap time of loop
+
+    def position(self, offset):
+        # position (lon, lat) of an object that started the route offset seconds ago
+        if len(self.coords) == 0:
+            return None
+        if self.closed and self.duration > 0:
+            offset = offset % self.duration
+        i = bisect_right(self.arrive, offset) - 1
+        if i < 0:
+            return self.coords[0]
+        if offset <= self.depart[i] or i == len(self.coords) - 1:
+            return self.coords[i]
+        a = (offset - self.depart[i]) / (self.arrive[i + 1] - self.depart[i])
+        return (
+            self.coords[i][0] + a * (self.coords[i + 1][0] - self.coords[i][0]),
+            self.coords[i][1] + a * (self.coords[i + 1][1] - self.coords[i][1]),
+        )
+
+
+class LoadEstimator:
+    """Steps LST traffic of an Objects.lst file forward in time and collects object counts."""
+
+    def __init__(self, filename: str, duration: float = DURATION, step: float = STEP, cell_size: float = CELL_SIZE, seed: int = SEED):
+        self.filename = filename
+        self.duration = duration
+        self.step = step
+        self.cell_size = cell_size
+        self.random = Random(seed)
+        self.timelines = []
+        self.spawns = {}  # route number -> sorted spawn times of highway objects
+        self.counts = []  # alive objects at each step
+        self.cells = {}  # (row, col) -> peak objects in cell
+        self.lat0 = None
+
+    def load(self):
+        with open_input(self.filename) as fp:
+            for route in read_routes(fp):
+                if len(route.coords) < 2:
+                    logger.warning(f"route {route.number} (line {route.lineno}) has less than 2 WP, ignored")
+                    continue
+                self.timelines.append(RouteTimeline(route))
+                if self.lat0 is None:
+                    self.lat0 = route.coords[0][1]
+        logger.info(f"{len(self.timelines)} routes loaded")
+
+    def highway_spawns(self, tl) -> list:
+        # Objects spawned before 0 that are still running at 0 are included,
+        # so that counts start in steady state.
+        args = tl.route.args
+        try:
+            lo = float(args[2])
+            hi = float(args[3])
+        except (IndexError, ValueError):
+            logger.warning(f"route {tl.route.number} (line {tl.route.lineno}) has invalid HIGHWAY spawn times, ignored")
+            return []
+        if hi <= 0 or tl.route.name == "NULL":
+            return []
+        lo = max(lo, 0.0)
+        hi = max(hi, lo)
+        spawns = []
+        t = -tl.duration
+        while t < self.duration:
+            spawns.append(t)
+            t = t + max(self.random.uniform(lo, hi), self.step)
+        return spawns
+
+    def simulate(self):
+        nsteps = int(self.duration / self.step) + 1
+        delta = [0] * (nsteps + 1)  # count variation at each step
+        for tl in self.timelines:
+            if tl.route.command == "HIGHWAY":
+                spawns = self.highway_spawns(tl)
+                self.spawns[tl.route.number] = spawns
+                for s in spawns:
+                    first = max(0, int(-(-s // self.step)))  # first step at or after spawn
+                    last = min(nsteps, int(-(-(s + tl.duration) // self.step)))  # first step after end
+                    if first < last:
+                        delta[first] = delta[first] + tl.objects
+                        delta[last] = delta[last] - tl.objects
+            else:
+                delta[0] = delta[0] + tl.objects
+        count = 0
+        self.counts = []
+        for i in range(nsteps):
+            count = count + delta[i]
+            self.counts.append(count)
+        self.grid()
+
+    def alive(self, tl, t) -> list:
+        # start times of objects of route alive at time t
+        if tl.route.command != "HIGHWAY":
+            return [0.0]
+        spawns = self.spawns.get(tl.route.number, [])
+        return spawns[bisect_right(spawns, t - tl.duration) : bisect_right(spawns, t)]
+
+    def cell(self, lon, lat):
+        km_per_lon = KM_PER_DEGREE * cos(radians(self.lat0))
+        return (floor(lat * KM_PER_DEGREE / self.cell_size), floor(lon * km_per_lon / self.cell_size))
+
+    def grid(self):
+        self.cells = {}
+        t = 0.0
+        while t <= self.duration:
+            counts = {}
+            for tl in self.timelines:
+                starts = self.alive(tl, t)
+                for s in starts:
+                    p = tl.position(t - s)
+                    c = self.cell(*p)
+                    counts[c] = counts.get(c, 0) + tl.objects
+            for c, n in counts.items():
+                if n > self.cells.get(c, 0):
+                    self.cells[c] = n
+            t = t + GRID_STEP
+
+    def report(self) -> dict:
+        counts = self.counts
+        peak = max(counts) if len(counts) > 0 else 0
+        area = self.cell_size * self.cell_size
+        routes = []
+        for tl in self.timelines:
+            r = tl.route
+            if r.command == "HIGHWAY":
+                spawns = self.spawns.get(r.number, [])
+                inside = bisect_left(spawns, self.duration) - bisect_left(spawns, 0)
+                mean = tl.objects * sum(min(s + tl.duration, self.duration) - max(s, 0) for s in spawns if s + tl.duration > 0) / self.duration
+            else:
+                inside = 1
+                mean = tl.objects
+            routes.append(
+                {
+                    "route": r.number,
+                    "lineno": r.lineno,
+                    "command": r.command,
+                    "name": r.name,
+                    "dwell(s)": round(tl.duration, 1),
+                    "spawned": inside,
+                    "mean objects": round(mean, 2),
+                }
+            )
+        cells = sorted(self.cells.items(), key=lambda c: -c[1])
+        return {
+            "filename": self.filename,
+            "duration(s)": self.duration,
+            "peak objects": peak,
+            "peak at(s)": counts.index(peak) * self.step if len(counts) > 0 else 0,
+            "mean objects": round(sum(counts) / len(counts), 2) if len(counts) > 0 else 0,
+            "cell size(km)": self.cell_size,
+            "peak objects per km2": round(cells[0][1] / area, 2) if len(cells) > 0 else 0,
+            "cells": [{"cell": c, "peak objects": n, "objects per km2": round(n / area, 2)} for c, n in cells],
+            "routes": routes,
+        }
+
+    def print(self, top: int = 10):
+        r = self.report()
+        print(f"{r['filename']}: {len(r['routes'])} routes simulated for {r['duration(s)']}s")
+        print(f"peak concurrent objects: {r['peak objects']} (at {r['peak at(s)']}s)")
+        print(f"mean concurrent objects: {r['mean objects']}")
+        print(f"peak objects per km2: {r['peak objects per km2']} ({r['cell size(km)']}km cells)")
+        print(f"busiest cells (row, col of {r['cell size(km)']}km):")
+        for c in r["cells"][:top]:
+            print(f"  {c['cell']}: {c['peak objects']} objects, {c['objects per km2']}/km2")
+        print("routes (route, line, command, name, dwell time, spawned, mean objects):")
+        for c in sorted(r["routes"], key=lambda c: -c["mean objects"])[:top]:
+            print(f"  #{c['route']} line {c['lineno']} {c['command']} {c['name']}: {c['dwell(s)']}s, {c['spawned']} spawned, {c['mean objects']} objects")
+
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Estimate concurrent LST objects of an Objects.lst file")
+    parser.add_argument("--duration", metavar="seconds", type=float, default=DURATION, help=f"simulated time (default {DURATION}s)")
+    parser.add_argument("--step", metavar="seconds", type=float, default=STEP, help=f"simulation time step (default {STEP}s)")
+    parser.add_argument("--cell", metavar="km", type=float, default=CELL_SIZE, help=f"grid cell size (default {CELL_SIZE}km)")
+    parser.add_argument("--seed", type=int, default=SEED, help="random seed for HIGHWAY spawn times")
+    parser.add_argument("--top", type=int, default=10, help="number of cells and routes reported")
+    parser.add_argument("--json", action="store_true", help="print full report as JSON")
+    parser.add_argument("objects_file", metavar="objects_file", type=str, nargs="?", default="Objects.lst", help="LST Objects.lst file to simulate")
+
+    args = parser.parse_args()
+
+    le = LoadEstimator(args.objects_file, duration=args.duration, step=args.step, cell_size=args.cell, seed=args.seed)
+    le.load()
+    le.simulate()
+    if args.json:
+        import json
+
+        print(json.dumps(le.report(), indent=2))
+    else:
+        le.print(top=args.top)
+
+
+if __name__ == "__main__":
+    main()
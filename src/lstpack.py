@@ -0,0 +1,292 @@
+# Packed binary route format with embedded spatial index
+#
+# For large sceneries, GeoJSON is slow to write, slow to load and cannot be
+# range-queried. This format stores all coordinates in one contiguous array
+# of doubles, and a packed Hilbert R-tree over feature bounding boxes
+# (same principle as FlatGeobuf), so that a reader can memory-map the file
+# and only touch the features that intersect a bounding box.
+#
+# Layout, all values little-endian, all sections 8-byte aligned:
+#
+#   Header, 96 bytes
+#       0  8s  magic b"LSTPACK\x01"
+#       8  I   feature count (n)
+#      12  I   R-tree node size (m)
+#      16  Q   point count
+#      24  4d  extent: min lon, min lat, max lon, max lat
+#      56  Q   feature table offset
+#      64  Q   index offset
+#      72  Q   coordinates offset
+#      80  Q   strings offset
+#      88  Q   strings length
+#
+#   Feature table, n records of 32 bytes, features sorted in Hilbert order of their bbox center
+#       Q  index of first point in coordinates
+#       Q  point count
+#       Q  properties offset in strings (JSON object, UTF-8)
+#       I  properties length
+#       I  geometry type, 1 = LineString, 2 = Polygon (exterior ring only)
+#
+#   Index, packed Hilbert R-tree nodes of 40 bytes, root first, leaves last
+#       4d min lon, min lat, max lon, max lat
+#       Q  leaves: feature index, other nodes: index of first child node
+#
+#   Coordinates, point count pairs of doubles (lon, lat)
+#
+#   Strings, feature properties
+#
+import logging
+import mmap
+import os
+import struct
+from array import array
+
+logger = logging.getLogger("LSTPack")
+
+MAGIC = b"LSTPACK\x01"
+HEADER = struct.Struct("<8sIIQ4dQQQQQ")
+FEATURE = struct.Struct("<QQQII")
+NODE = struct.Struct("<4dQ")
+NODE_SIZE = 16
+HILBERT_MAX = (1 << 16) - 1
+GEOMETRY_TYPES = {"LineString": 1, "Polygon": 2}
+GEOMETRY_NAMES = {v: k for k, v in GEOMETRY_TYPES.items()}
+
+
+def hilbert(x: int, y: int) -> int:
+    # distance of (x, y) along a Hilbert curve filling a 2^16 x 2^16 grid
+    d = 0
+    s = 1 << 15
+    while s > 0:
+        rx = 1 if (x & s) > 0 else 0
+        ry = 1 if (y & s) > 0 else 0
+        d = d + s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - x
+                y = s - 1 - y
+            x, y = y, x
+        s = s >> 1
+    return d
+
+
+def level_bounds(count: int, node_size: int) -> list:
+    # [(start, end)] of node indices of each level, leaves first, with nodes stored root first
+    counts = [count]
+    n = count
+    while n > 1:
+        n = -(-n // node_size)
+        counts.append(n)
+    total = sum(counts)
+    bounds = []
+    end = total
+    for c in counts:
+        bounds.append((end - c, end))
+        end = end - c
+    return bounds
+
+
+def geometry_points(feature):
+    geom = feature.get("geometry", {})
+    coords = geom.get("coordinates", [])
+    if geom.get("type") == "Polygon":
+        coords = coords[0] if len(coords) > 0 else []
+    return GEOMETRY_TYPES.get(geom.get("type"), 1), coords
+
+
+def write_packed(filename: str, features: list, node_size: int = NODE_SIZE):
+    """Writes GeoJSON LineString or Polygon features into a packed route file."""
+    import json
+
+    items = []
+    for f in features:
+        gtype, coords = geometry_points(f)
+        if len(coords) == 0:
+            continue
+        lons = [c[0] for c in coords]
+        lats = [c[1] for c in coords]
+        items.append((f, gtype, coords, (min(lons), min(lats), max(lons), max(lats))))
+
+    n = len(items)
+    if n > 0:
+        extent = (min(i[3][0] for i in items), min(i[3][1] for i in items), max(i[3][2] for i in items), max(i[3][3] for i in items))
+    else:
+        extent = (0.0, 0.0, 0.0, 0.0)
+    width = (extent[2] - extent[0]) or 1.0
+    height = (extent[3] - extent[1]) or 1.0
+
+    def hilbert_of(item):
+        b = item[3]
+        x = int(HILBERT_MAX * ((b[0] + b[2]) / 2 - extent[0]) / width)
+        y = int(HILBERT_MAX * ((b[1] + b[3]) / 2 - extent[1]) / height)
+        return hilbert(x, y)
+
+    items.sort(key=hilbert_of)
+
+    # coordinates, strings and feature table
+    coords = array("d")
+    strings = bytearray()
+    table = bytearray()
+    for f, gtype, fcoords, b in items:
+        props = json.dumps(f.get("properties", {})).encode("utf-8")
+        table += FEATURE.pack(len(coords) // 2, len(fcoords), len(strings), len(props), gtype)
+        for c in fcoords:
+            coords.append(c[0])
+            coords.append(c[1])
+        strings += props
+
+    # packed R-tree, leaves are features bboxes, parents are built level by level
+    levels = level_bounds(n, node_size) if n > 0 else []
+    nodes = [None] * (levels[0][1] if n > 0 else 0)
+    if n > 0:
+        start, end = levels[0]
+        for i, item in enumerate(items):
+            nodes[start + i] = item[3] + (i,)
+        for level in range(1, len(levels)):
+            cstart, cend = levels[level - 1]
+            pos = levels[level][0]
+            for child in range(cstart, cend, node_size):
+                children = nodes[child : min(child + node_size, cend)]
+                nodes[pos] = (
+                    min(c[0] for c in children),
+                    min(c[1] for c in children),
+                    max(c[2] for c in children),
+                    max(c[3] for c in children),
+                    child,
+                )
+                pos = pos + 1
+    index = bytearray()
+    for node in nodes:
+        index += NODE.pack(*node)
+
+    table_offset = HEADER.size
+    index_offset = table_offset + len(table)
+    coords_offset = index_offset + len(index)
+    strings_offset = coords_offset + len(coords) * coords.itemsize
+    header = HEADER.pack(MAGIC, n, node_size, len(coords) // 2, *extent, table_offset, index_offset, coords_offset, strings_offset, len(strings))
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        coords.byteswap()
+    with open(filename, "wb") as fp:
+        fp.write(header)
+        fp.write(table)
+        fp.write(index)
+        coords.tofile(fp)
+        fp.write(strings)
+    logger.debug(f"{filename}: {n} features, {len(coords) // 2} points, {len(nodes)} index nodes")
+
+
+class PackedRoutes:
+    """Reads a packed route file through a memory map.
+
+    Only the index nodes visited and the features returned by a query are read.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.view = None
+        self.coords = None
+        self.fp = open(filename, "rb")
+        self.map = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.map, 0)
+        if header[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{filename}: not a packed route file")
+        (_, self.count, self.node_size, self.points) = header[:4]
+        self.extent = header[4:8]
+        (self.table_offset, self.index_offset, self.coords_offset, self.strings_offset, self.strings_length) = header[8:]
+        self.levels = level_bounds(self.count, self.node_size) if self.count > 0 else []
+        # coordinates are read in place, as native doubles (little-endian platforms)
+        self.view = memoryview(self.map)
+        self.coords = self.view[self.coords_offset : self.coords_offset + 16 * self.points].cast("d")
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.map is not None:
+            if self.view is not None:
+                self.coords.release()
+                self.view.release()
+            self.map.close()
+            self.fp.close()
+            self.map = None
+
+    def feature(self, i: int) -> dict:
+        import json
+
+        (start, count, props_offset, props_length, gtype) = FEATURE.unpack_from(self.map, self.table_offset + i * FEATURE.size)
+        props = self.map[self.strings_offset + props_offset : self.strings_offset + props_offset + props_length]
+        flat = self.coords[2 * start : 2 * (start + count)]
+        coords = [[flat[j], flat[j + 1]] for j in range(0, len(flat), 2)]
+        return {
+            "type": "Feature",
+            "properties": json.loads(props.decode("utf-8")),
+            "geometry": {
+                "type": GEOMETRY_NAMES.get(gtype, "LineString"),
+                "coordinates": [coords] if gtype == 2 else coords,
+            },
+        }
+
+    def search(self, box: tuple) -> list:
+        # indices of features whose bbox intersects box (north, south, east, west).
+        # A box crossing the antimeridian (east < west) is searched as its two halves.
+        (n, s, e, w) = box
+        if e < w:
+            return sorted(set(self.search((n, s, 180.0, w))) | set(self.search((n, s, e, -180.0))))
+        if self.count == 0:
+            return []
+        found = []
+        top = len(self.levels) - 1
+        stack = [(self.levels[top][0], top)]
+        while len(stack) > 0:
+            first, level = stack.pop()
+            end = min(first + self.node_size, self.levels[level][1])
+            for pos in range(first, end):
+                (minx, miny, maxx, maxy, offset) = NODE.unpack_from(self.map, self.index_offset + pos * NODE.size)
+                if maxx < w or minx > e or maxy < s or miny > n:
+                    continue
+                if level == 0:
+                    found.append(offset)
+                else:
+                    stack.append((offset, level - 1))
+        return sorted(found)
+
+    def query(self, box: tuple):
+        # yields GeoJSON features intersecting box (north, south, east, west)
+        for i in self.search(box):
+            yield self.feature(i)
+
+    def features(self):
+        for i in range(self.count):
+            yield self.feature(i)
+
+
+def main():
+    import sys
+    import json
+    import argparse
+
+    # Command-line arguments
+    #
+    parser = argparse.ArgumentParser(description="Query a packed LST route file")
+    parser.add_argument("--bbox", metavar=("north", "south", "east", "west"), type=float, nargs=4, help="only output features intersecting bounding box")
+    parser.add_argument("packed_file", metavar="packed_file", type=str, help="packed route file to query")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.packed_file):
+        parser.print_help()
+        sys.exit(1)
+
+    with PackedRoutes(args.packed_file) as pr:
+        features = list(pr.query(tuple(args.bbox)) if args.bbox is not None else pr.features())
+    print(json.dumps({"type": "FeatureCollection", "features": features}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
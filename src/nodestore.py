@@ -0,0 +1,76 @@
+# Disk-backed node table for the LST generator
+#
+# Country-scale doc.osm files have more nodes than comfortably fit in memory
+# as dictionaries. NodeStore keeps nodes in a private temporary SQLite database,
+# keyed by node id, and returns them as the same {"id", "lat", "lon", "tags"}
+# dictionaries as the in-memory table, so way resolution and route writing
+# use either one unchanged.
+# SQLite keeps at most CACHE_SIZE of pages in memory, the rest is on disk
+# in the temporary folder (TMPDIR, or SQLITE_TMPDIR). The database is removed
+# when the store is closed or garbage collected.
+#
+import json
+import sqlite3
+
+CACHE_SIZE = 65536  # KiB of SQLite page cache
+BATCH = 10000  # nodes inserted at once
+
+
+class NodeStore:
+    """Read-only mapping of node id to node dictionary, on disk, filled with add()."""
+
+    def __init__(self, nodes=()):
+        self.db = sqlite3.connect("")  # empty name: private temporary database on disk
+        self.db.execute(f"PRAGMA cache_size = -{CACHE_SIZE}")
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, lat INTEGER, lon INTEGER, tags TEXT) WITHOUT ROWID")
+        self.pending = []
+        self.count = 0  # None when to be counted again
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: dict):
+        tags = node.get("tags")
+        self.pending.append((node["id"], node["lat"], node["lon"], json.dumps(tags) if tags else None))
+        if len(self.pending) >= BATCH:
+            self.flush()
+
+    def flush(self):
+        if len(self.pending) > 0:
+            self.db.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)", self.pending)
+            self.pending = []
+            self.count = None
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def node(row) -> dict:
+        return {"id": row[0], "lat": row[1], "lon": row[2], "tags": json.loads(row[3]) if row[3] is not None else {}}
+
+    def get(self, node_id, default=None):
+        self.flush()
+        row = self.db.execute("SELECT id, lat, lon, tags FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        return NodeStore.node(row) if row is not None else default
+
+    def __getitem__(self, node_id) -> dict:
+        node = self.get(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id) -> bool:
+        self.flush()
+        return self.db.execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,)).fetchone() is not None
+
+    def __len__(self):
+        self.flush()
+        if self.count is None:
+            self.count = self.db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        return self.count
+
+    def values(self):
+        # all nodes, in node id order, streamed from disk
+        self.flush()
+        return (NodeStore.node(row) for row in self.db.execute("SELECT id, lat, lon, tags FROM nodes"))
@@ -0,0 +1,101 @@
+# Fast scanner for WED doc.osm files
+#
+# WED writes doc.osm with a very regular layout: node elements with id, visible, lat
+# and lon attributes, then way elements, with nd and tag elements inside, and nothing else.
+# Instead of building ElementTree elements, the scanner matches whole node and way
+# elements with regular expressions over the raw bytes, which can be a memory-mapped file,
+# and yields the same node and way dictionaries as the generator ElementTree parser.
+# Elements must follow each other exactly, so anything unusual (comments, CDATA, DOCTYPE,
+# other elements or attributes, encodings other than UTF-8, invalid UTF-8, control characters
+# or entities other than the XML ones in attribute values...) stops the scan with ScanError,
+# and the caller falls back to ElementTree, which then parses or rejects the file.
+#
+import re
+
+from fixedpoint import to_fixed
+
+VALUE = rb"""(?:'[^'<\x00-\x1f]*'|"[^"<\x00-\x1f]*")"""
+NUMBER = rb"""(?:'([-+0-9.eE]+)'|"([-+0-9.eE]+)")"""
+TAG_ELEMENT = rb"<tag\s+k=" + VALUE + rb"\s+v=" + VALUE + rb"\s*/>"
+ND_ELEMENT = rb"<nd\s+ref=" + VALUE + rb"\s*/>"
+
+HEADER = re.compile(rb"""\s*(?:<\?xml([^<>]*)\?>)?\s*<osm(?:\s[^<>]*)?>""")
+ENCODING = re.compile(rb"""encoding\s*=\s*['"]([^'"]*)['"]""")
+ELEMENT = re.compile(
+    rb"\s*(?:"
+    rb"<node\s+id=(" + VALUE + rb")(?:\s+visible=" + VALUE + rb")?\s+lat=" + NUMBER + rb"\s+lon=" + NUMBER
+    + rb"\s*(?:/>|>((?:\s*" + TAG_ELEMENT + rb")*)\s*</node>)"
+    rb"|<way\s+id=(" + VALUE + rb")(?:\s+visible=" + VALUE + rb")?\s*(?:/>|>((?:\s*(?:" + ND_ELEMENT + rb"|" + TAG_ELEMENT + rb"))*)\s*</way>)"
+    rb"|<bounds(?:\s[^<>]*)?/>"
+    rb")"
+)
+FOOTER = re.compile(rb"\s*</osm>\s*")
+TAG = re.compile(r"""<tag\s+k=(?:'([^']*)'|"([^"]*)")\s+v=(?:'([^']*)'|"([^"]*)")""")  # on decoded element content
+ND = re.compile(r"""<nd\s+ref=(?:'([^']*)'|"([^"]*)")""")
+REFERENCE = re.compile(r"&([^&;]*)(;?)")
+ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+
+
+class ScanError(ValueError):
+    pass
+
+
+def reference(m) -> str:
+    # replacement of an XML entity or character reference, the only ones ElementTree accepts
+    name = m.group(1)
+    if m.group(2) == ";":
+        if name in ENTITIES:
+            return ENTITIES[name]
+        try:
+            code = int(name[2:], 16) if name.startswith("#x") else int(name[1:]) if name.startswith("#") else None
+        except ValueError:
+            code = None
+        if code is not None and (code in [0x9, 0xA, 0xD] or 0x20 <= code <= 0xD7FF or 0xE000 <= code <= 0xFFFD or 0x10000 <= code <= 0x10FFFF):
+            return chr(code)
+    raise ScanError(f"undefined entity &{name}{m.group(2)}")
+
+
+def text(value: str) -> str:
+    # attribute value, quotes excluded
+    return REFERENCE.sub(reference, value) if "&" in value else value
+
+
+def decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ScanError(f"invalid UTF-8: {e}")
+
+
+def tags(body: str) -> dict:
+    return {text(k1 or k2): text(v1 or v2) for k1, k2, v1, v2 in TAG.findall(body)} if "<tag" in body else {}
+
+
+def elements(data):
+    # yields ("node", node) and ("way", way) dictionaries of doc.osm content in data, bytes or mmap
+    m = HEADER.match(data)
+    if m is None:
+        raise ScanError("no osm element at start of file")
+    if m.group(1) is not None and (enc := ENCODING.search(m.group(1))) is not None and enc.group(1).lower() not in [b"utf-8", b"utf8"]:
+        raise ScanError(f"encoding {enc.group(1).decode(errors='replace')}")
+    pos = m.end()
+    match = ELEMENT.match
+    while (m := match(data, pos)) is not None:
+        pos = m.end()
+        node_id, lat1, lat2, lon1, lon2, node_body, way_id, way_body = m.groups()
+        if node_id is not None:
+            yield ("node", {
+                "id": text(decode(node_id[1:-1])),
+                "lat": to_fixed(lat1 or lat2),
+                "lon": to_fixed(lon1 or lon2),
+                "tags": tags(decode(node_body)) if node_body else {}
+            })
+        elif way_id is not None:
+            body = decode(way_body) if way_body else ""
+            yield ("way", {
+                "id": text(decode(way_id[1:-1])),
+                "nodes": [r1 or r2 for r1, r2 in ND.findall(body)] if "&" not in body else [text(r1 or r2) for r1, r2 in ND.findall(body)],
+                "tags": tags(body)
+            })
+    if FOOTER.fullmatch(data, pos) is None:
+        raise ScanError(f"unexpected content at offset {pos}: {bytes(data[pos:pos + 40]).decode(errors='replace').strip()}")
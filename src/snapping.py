@@ -0,0 +1,142 @@
+# Node snapping and shared-vertex graph for the LST generator
+#
+# Nodes of all ways that are closer than a tolerance (in meters) are merged
+# into a single shared vertex. Candidates are found through a spatial hash
+# of cells at least tolerance wide, so each node only looks at its 3x3 cell
+# neighbourhood instead of at all other nodes.
+# Ways are then attached once to the vertices they go through, so that
+# "which routes start here?" becomes a dictionary lookup.
+#
+# A graph can index start vertices only (starts_only), for very large inputs:
+# only the first node of each way is added, and other nodes are located
+# by position when routes starting near them are looked up.
+#
+# Positions are fixed-point (see fixedpoint), so that cells are computed
+# with exact integer divisions and identical positions are found without trigonometry.
+#
+from math import sin, cos, sqrt, atan2, radians, ceil, pi
+
+from fixedpoint import SCALE, fixed_array
+
+EARTH_RADIUS = 6373000.0  # Approximate radius of earth in meters, same as generator
+METERS_PER_DEGREE = EARTH_RADIUS * pi / 180
+MIN_COS = 0.01  # cells do not get wider than this near the poles
+CELL_MARGIN = 1.01  # cells slightly larger than tolerance to absorb projection approximations
+
+
+def distance(lat1, lon1, lat2, lon2) -> float:
+    # distance between points in meters
+    lat1 = radians(lat1)
+    lon1 = radians(lon1)
+    lat2 = radians(lat2)
+    lon2 = radians(lon2)
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+class VertexGraph:
+    """Snaps near-coincident nodes into shared vertices and keeps a vertex-to-ways adjacency.
+
+    Nodes are snapped greedily, in the order they are added: a node joins the closest
+    existing vertex within tolerance, or creates a new vertex at its own position.
+    """
+
+    def __init__(self, tolerance: float = 1.0, starts_only: bool = False):
+        self.tolerance = tolerance
+        self.starts_only = starts_only  # only way start nodes are added and attached
+        self.cell_height = max(1, ceil(tolerance * CELL_MARGIN / METERS_PER_DEGREE * SCALE))  # in fixed-point latitude
+        self.cell_widths = {}  # row -> cell width in fixed-point longitude
+        self.cells = {}  # (row, col) -> [vertex]
+        self.vertices = fixed_array()  # lat, lon of vertex v at 2v, 2v+1
+        self.node_vertex = {}  # node id -> vertex
+        self.ways = {}  # vertex -> [(route, position in way)]
+        self.starts = {}  # vertex -> [route], in the order ways were added
+        self.merged = 0  # number of nodes snapped onto an existing vertex
+
+    def __len__(self):
+        return len(self.vertices) // 2
+
+    def position(self, v) -> tuple:
+        return (self.vertices[2 * v], self.vertices[2 * v + 1])
+
+    def row(self, lat: int) -> int:
+        return lat // self.cell_height
+
+    def col(self, row: int, lon: int) -> int:
+        # cell width in longitude for a given row, computed at the poleward edge
+        # of the row so that cells are always at least tolerance wide
+        width = self.cell_widths.get(row)
+        if width is None:
+            edge = max(abs(row * self.cell_height), abs((row + 1) * self.cell_height)) / SCALE
+            width = ceil(self.cell_height / max(cos(radians(min(edge, 90))), MIN_COS))
+            self.cell_widths[row] = width
+        return lon // width
+
+    def nearest(self, lat: int, lon: int):
+        # returns closest vertex within tolerance, or None
+        best = None
+        best_dist = self.tolerance
+        row = self.row(lat)
+        for r in (row - 1, row, row + 1):
+            col = self.col(r, lon)
+            for c in (col - 1, col, col + 1):
+                for v in self.cells.get((r, c), []):
+                    vlat = self.vertices[2 * v]
+                    vlon = self.vertices[2 * v + 1]
+                    if vlat == lat and vlon == lon:
+                        return v
+                    d = distance(lat / SCALE, lon / SCALE, vlat / SCALE, vlon / SCALE)
+                    if d < best_dist:
+                        best = v
+                        best_dist = d
+        return best
+
+    def add_node(self, node_id, lat: int, lon: int) -> int:
+        # snaps node at fixed-point position and returns its vertex
+        if (v := self.node_vertex.get(node_id)) is not None:
+            return v
+        v = self.nearest(lat, lon)
+        if v is None:
+            v = len(self)
+            self.vertices.append(lat)
+            self.vertices.append(lon)
+            row = self.row(lat)
+            self.cells.setdefault((row, self.col(row, lon)), []).append(v)
+        else:
+            self.merged = self.merged + 1
+        self.node_vertex[node_id] = v
+        return v
+
+    def add_way(self, route, node_ids):
+        # attaches route to all vertices it goes through. Nodes must have been added before.
+        for position, node_id in enumerate(node_ids[:1] if self.starts_only else node_ids):
+            v = self.node_vertex.get(node_id)
+            if v is None:
+                continue
+            self.ways.setdefault(v, []).append((route, position))
+            if position == 0:
+                self.starts.setdefault(v, []).append(route)
+
+    def vertex(self, node_id):
+        return self.node_vertex.get(node_id)
+
+    def routes_at(self, node_id) -> list:
+        # all (route, position) going through node's vertex
+        return self.ways.get(self.node_vertex.get(node_id), [])
+
+    def routes_starting_at(self, node_id, lat: int = None, lon: int = None) -> list:
+        # if node was not added, its vertex is searched at lat, lon when given
+        v = self.node_vertex.get(node_id)
+        if v is None and lat is not None:
+            v = self.nearest(lat, lon)
+        return self.starts.get(v, [])
+
+    def branch_at(self, node_id, route, lat: int = None, lon: int = None):
+        # last route, other than route, that starts at node's vertex
+        for r in reversed(self.routes_starting_at(node_id, lat, lon)):
+            if r != route:
+                return r
+        return None
@@ -0,0 +1,90 @@
+# Geographic tiling of LST routes
+#
+# Routes are partitioned into square tiles of a given size in degrees.
+# A route, or a group of routes that must stay together like routes that branch
+# onto each other, is never cut: it goes whole into the tile that contains the
+# center of its bounding box. The bounding box of a tile is the union of the
+# bounding boxes of its routes, so it may slightly overlap neighbouring tiles.
+#
+from math import floor
+
+MIN_DECIMALS = 2  # decimals of tile names
+MAX_DECIMALS = 9
+
+
+class Tile:
+    def __init__(self, key: tuple, size: float):
+        self.key = key  # (row, col)
+        self.size = size
+        self.items = []
+        self.north = -90
+        self.south = 90
+        self.east = -180
+        self.west = 180
+
+    def name(self) -> str:
+        # south-west corner of tile, like +50.90+004.40, with enough decimals to tell tiles of size apart
+        d = tile_decimals(self.size)
+        return f"{self.key[0] * self.size:+0{4 + d}.{d}f}{self.key[1] * self.size:+0{5 + d}.{d}f}"
+
+    def add(self, item, box: tuple):
+        self.items.append(item)
+        (n, s, e, w) = box
+        self.north = max(self.north, n)
+        self.south = min(self.south, s)
+        self.east = max(self.east, e)
+        self.west = min(self.west, w)
+
+    def bounding_box(self) -> tuple:
+        return (self.north, self.south, self.east, self.west)
+
+
+def bbox(points) -> tuple:
+    # (north, south, east, west) of (lat, lon) points
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return (max(lats), min(lats), max(lons), min(lons))
+
+
+def union(boxes) -> tuple:
+    boxes = list(boxes)
+    return (max(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), min(b[3] for b in boxes))
+
+
+def intersects(box: tuple, other: tuple) -> bool:
+    # both are (north, south, east, west), box may cross the antimeridian (east < west)
+    (n, s, e, w) = box
+    (n2, s2, e2, w2) = other
+    if n2 < s or s2 > n:
+        return False
+    if e >= w:
+        return not (e2 < w or w2 > e)
+    return not (e2 < w and w2 > e)  # box is [w, 180] + [-180, e]
+
+
+def tile_decimals(size: float) -> int:
+    # decimals of tile corners in tile names, at least 2, enough for size itself
+    d = MIN_DECIMALS
+    while d < MAX_DECIMALS and abs(size * 10**d - round(size * 10**d)) > 1e-6:
+        d = d + 1
+    return d
+
+
+def tile_key(lat, lon, size: float) -> tuple:
+    return (floor(lat / size), floor(lon / size))
+
+
+def partition(items, size: float) -> list:
+    # items is an iterable of (item, box), box being (north, south, east, west).
+    # Returns tiles, sorted south to north, west to east, with items in their original order.
+    tiles = {}
+    for item, box in items:
+        (n, s, e, w) = box
+        key = tile_key((n + s) / 2, (e + w) / 2, size)
+        if key not in tiles:
+            tiles[key] = Tile(key, size)
+        tiles[key].add(item, box)
+    names = set(t.name() for t in tiles.values())
+    if len(names) != len(tiles):  # would overwrite each other files
+        raise ValueError(f"{len(tiles)} tiles of size {size} have only {len(names)} different names")
+    return [tiles[k] for k in sorted(tiles.keys())]
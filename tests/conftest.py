@@ -0,0 +1,7 @@
+# Tools are flat modules in src/, imported like the command line entry points do
+import sys
+
+from paths import SRC
+
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,175 @@
+# Minimal stand-in for the XPPython3 xp module
+#
+# Lets PI_restart_lst run outside X-Plane: commands, menus, plugins and
+# flight loops are simulated, and simulated time only advances through run().
+#
+#   import fake_xp
+#   fake_xp.install()  # must be done before importing PI_restart_lst
+#   from PI_restart_lst import PythonInterface
+#
+# Used by test_restart_lst, it is not part of the installed package.
+#
+import os
+import sys
+import time
+
+NO_PLUGIN_ID = -1
+CommandBegin = 0
+CommandContinue = 1
+CommandEnd = 2
+FlightLoop_Phase_BeforeFlightModel = 0
+FlightLoop_Phase_AfterFlightModel = 1
+
+LST_PLUGIN_ID = 7
+LST_PLUGIN_PATH = os.path.join("Resources", "plugins", "LST", "64", "lin.xpl")
+FRAME_RATE = 30  # frames per second
+
+# Simulator state
+#
+elapsed = 0.0
+frames = 0
+commands = {}  # name: [handlers]
+menu = []
+plugins = {}  # signature: plugin id
+plugin_enabled = {}  # plugin id: bool
+calls = []  # (elapsed, "disable" or "enable", plugin id)
+flight_loops = {}  # id: [callback, refCon, next call time or None]
+flight_loop_calls = 0
+flight_loop_time = 0.0  # seconds spent in flight loop callbacks
+
+
+class PluginInfo:
+    def __init__(self, name: str, filePath: str, signature: str, description: str):
+        self.name = name
+        self.filePath = filePath
+        self.signature = signature
+        self.description = description
+
+
+def reset(signatures: dict = None):
+    global elapsed, frames, commands, menu, plugins, plugin_enabled, calls, flight_loops, flight_loop_calls, flight_loop_time
+    elapsed = 0.0
+    frames = 0
+    commands = {}
+    menu = []
+    plugins = signatures if signatures is not None else {"com.x-codrdesigns.livingscenerytech": LST_PLUGIN_ID}
+    plugin_enabled = {p: True for p in plugins.values()}
+    calls = []
+    flight_loops = {}
+    flight_loop_calls = 0
+    flight_loop_time = 0.0
+
+
+def install():
+    # makes "import xp" return this module
+    reset()
+    sys.modules["xp"] = sys.modules[__name__]
+
+
+# xp API
+#
+def getElapsedTime() -> float:
+    return elapsed
+
+
+def createCommand(name: str, description: str):
+    commands.setdefault(name, [])
+    return name
+
+
+def registerCommandHandler(commandRef, callback, before=1, refCon=None):
+    commands[commandRef].append((callback, refCon))
+
+
+def unregisterCommandHandler(commandRef, callback, before=1, refCon=None):
+    commands[commandRef] = [h for h in commands[commandRef] if h[0] != callback]
+
+
+def findPluginsMenu():
+    return "plugins"
+
+
+def appendMenuItemWithCommand(menuID, name: str, commandRef) -> int:
+    menu.append((name, commandRef))
+    return len(menu) - 1
+
+
+def removeMenuItem(menuID, index: int):
+    menu[index] = None
+
+
+def findPluginBySignature(signature: str) -> int:
+    return plugins.get(signature, NO_PLUGIN_ID)
+
+
+def getPluginInfo(pluginID: int):
+    for signature, plugin_id in plugins.items():
+        if plugin_id == pluginID:
+            return PluginInfo(signature, LST_PLUGIN_PATH, signature, "")
+    return None
+
+
+def isPluginEnabled(pluginID: int) -> int:
+    return 1 if plugin_enabled.get(pluginID, False) else 0
+
+
+def disablePlugin(pluginID: int):
+    plugin_enabled[pluginID] = False
+    calls.append((elapsed, "disable", pluginID))
+
+
+def enablePlugin(pluginID: int):
+    plugin_enabled[pluginID] = True
+    calls.append((elapsed, "enable", pluginID))
+
+
+def createFlightLoop(callback, phase: int = FlightLoop_Phase_BeforeFlightModel, refCon=None):
+    loop_id = len(flight_loops) + 1
+    flight_loops[loop_id] = [callback, refCon, None]
+    return loop_id
+
+
+def scheduleFlightLoop(loopID, interval: float = 0.0, relativeToNow: int = 1):
+    loop = flight_loops[loopID]
+    if interval == 0:
+        loop[2] = None
+    elif interval < 0:
+        loop[2] = elapsed + 1e-9  # next frame
+    else:
+        loop[2] = elapsed + interval
+
+
+def destroyFlightLoop(loopID):
+    del flight_loops[loopID]
+
+
+# Simulation
+#
+def command(name: str):
+    # one key press: begin, continue and end phases
+    for phase in [CommandBegin, CommandContinue, CommandEnd]:
+        for callback, refCon in list(commands.get(name, [])):
+            callback(name, phase, refCon)
+
+
+def frame():
+    # advances time by one frame and calls due flight loops
+    global elapsed, frames, flight_loop_calls, flight_loop_time
+    frames = frames + 1
+    elapsed = elapsed + 1.0 / FRAME_RATE
+    for loop_id, loop in list(flight_loops.items()):
+        if loop[2] is None or loop[2] > elapsed:
+            continue
+        flight_loop_calls = flight_loop_calls + 1
+        start = time.perf_counter()
+        ret = loop[0](1.0 / FRAME_RATE, elapsed, frames, loop[1])
+        flight_loop_time = flight_loop_time + time.perf_counter() - start
+        if loop_id in flight_loops:
+            scheduleFlightLoop(loop_id, ret)
+
+
+def run(seconds: float):
+    end = elapsed + seconds
+    while elapsed < end:
+        frame()
+
@@ -0,0 +1,4 @@
+# Location of the tools, flat modules in src/ imported like the command line entry points do
+import os
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
@@ -0,0 +1,38 @@
+# Converter library entry point
+#
+import io
+import logging
+
+import pytest
+
+from biglib import BigLib
+from converter import convert
+
+SAMPLE = """# sample
+route 20 0 0 lib/bus.obj
+50.900 4.480
+50.901 4.481
+"""
+
+
+def test_convert_text_or_stream():
+    assert convert(text=SAMPLE) == convert(stream=io.StringIO(SAMPLE))
+
+
+def test_convert_without_content():
+    with pytest.raises(ValueError):
+        convert()
+
+
+def test_shared_library_local_path(tmp_path, caplog):
+    # local folder of one conversion does not leak into the next one sharing the library
+    (tmp_path / "objects").mkdir()
+    (tmp_path / "objects" / "local.obj").write_text("")
+    library = BigLib(str(tmp_path))
+    text = SAMPLE.replace("lib/bus.obj", "objects/local.obj")
+    with caplog.at_level(logging.WARNING, logger="BigLib"):
+        convert(text=text, objects=library, local_path=str(tmp_path))
+        assert caplog.records == []
+        convert(text=text, objects=library)
+    assert ["not found" in r.message for r in caplog.records] == [True]
+    assert library.localpath is None
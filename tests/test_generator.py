@@ -0,0 +1,44 @@
+# Generator input files and diagnostics
+#
+import bz2
+import gzip
+import logging
+import lzma
+
+import pytest
+
+from generator import AUTO, ETREE, FAST, generate, parse
+
+DOC = b"""<?xml version='1.0' encoding='UTF-8'?>
+<osm version='0.6' generator='WorldEditor'>
+ <node id='-1' visible='true' lat='50.9' lon='4.48'/>
+ <node id='-2' visible='true' lat='50.91' lon='4.49'/>
+ <way id='-3' visible='true'>
+  <nd ref='-1'/>
+  <nd ref='-2'/>
+  <tag k='name' v='lib/bus.obj'/>
+ </way>
+</osm>
+"""
+COMPRESSIONS = {".gz": gzip.compress, ".xz": lzma.compress, ".bz2": bz2.compress}
+
+
+@pytest.mark.parametrize("engine", [AUTO, FAST, ETREE])
+@pytest.mark.parametrize("ext", COMPRESSIONS)
+def test_compressed_file_name(tmp_path, ext, engine):
+    filename = tmp_path / ("doc.osm" + ext)
+    filename.write_bytes(COMPRESSIONS[ext](DOC))
+    assert parse(str(filename), engine=engine) == parse(DOC, engine=engine)
+    # doc.osm is found under its compressed name
+    assert generate(str(tmp_path / "doc.osm"), engine=engine) == generate(DOC, engine=engine)
+
+
+def test_way_without_description(caplog):
+    doc = DOC.replace(b"  <tag k='name' v='lib/bus.obj'/>\n", b"")
+    doc = doc.replace(b"<node id='-2' visible='true' lat='50.91' lon='4.49'/>", b"<node id='-2' visible='true' lat='50.91' lon='4.49'><tag k='description' v='BRANCHIF_sim/x==1'/></node>")
+    with caplog.at_level(logging.WARNING):
+        init, objects = generate(doc)
+    assert "BRANCHIF,None,sim/x==1" in objects
+    messages = [r.message for r in caplog.records]
+    assert any("way -3" in m and "no description" in m for m in messages)
+    assert any("way -3" in m and "no route starts there" in m for m in messages)
@@ -0,0 +1,23 @@
+# Library usage index
+#
+from libusage import LibUsage
+
+OBJECTS = """HIGHWAY,lib/car.obj,10,20
+WP,50.900,4.480,fast
+WP,50.901,4.481
+"""
+
+
+def test_scan_goes_past_bad_files(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "Objects.lst").write_text(OBJECTS)
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "Objects.lst").write_bytes(b"\x1f\x8b\x08\x00truncated gzip")
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "GroundTraffic.txt").write_text("route 20 0 0 lib/bus.obj\n50.9 4.48\n50.901 4.481\n")
+    with LibUsage(str(tmp_path / "usage.sqlite")) as usage:
+        assert usage.scan([str(tmp_path)]) == (2, 0, 0, 1)
+        assert [lineno for path, lineno in usage.uses("lib/car.obj")] == [1]
+        assert len(usage.uses("lib/bus.obj")) == 1
+        # failed files are not recorded, they are read again on next scan
+        assert usage.scan([str(tmp_path)]) == (0, 2, 0, 1)
@@ -0,0 +1,32 @@
+# Objects.lst route reading, shared by lst2geojson, lstload, lstdiff and lstindex
+#
+import logging
+
+from lst2geojson import read_routes, to_geojson
+
+ROUTES = """HIGHWAY,lib/car.obj,10,20
+WP,50.900,4.480,fast
+WAIT,long
+WP,50.901,4.481,12
+WAIT,5
+WP,north,4.482
+
+TRAIN,lib/train.obj
+WP,50.910,4.490
+WP,50.911,4.491
+"""
+
+
+def test_invalid_numbers(caplog):
+    with caplog.at_level(logging.WARNING):
+        routes = list(read_routes(ROUTES.splitlines()))
+    assert len(routes) == 2
+    assert routes[0].coords == [[4.48, 50.9], [4.481, 50.901]]
+    assert routes[0].speeds == [None, 12.0]
+    assert routes[0].waits == [0.0, 5.0]
+    assert len(routes[1].coords) == 2
+    assert [r.message.split(":")[0] for r in caplog.records] == ["line 2", "line 3", "line 6"]
+
+
+def test_invalid_numbers_in_box():
+    assert len(to_geojson(ROUTES, box=(51, 50, 5, 4))["features"]) == 2
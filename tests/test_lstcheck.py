@@ -0,0 +1,46 @@
+# Objects.lst validation
+#
+from lstcheck import LSTCheck, ERROR, WARNING
+
+
+def problems(text: str) -> list:
+    check = LSTCheck("Objects.lst")
+    check.check_lines(text.splitlines())
+    return [(lineno, level) for lineno, level, message in check.problems]
+
+
+def test_generator_highway_placeholder():
+    # written by the generator for ways without a valid description
+    assert problems("HIGHWAY,NULL,-1,-1\nWP,50.9,4.48\nWP,50.91,4.49\n") == [(1, WARNING)]
+
+
+def test_highway_without_object():
+    assert problems("HIGHWAY,NULL,20,0\nWP,50.9,4.48\nWP,50.91,4.49\n") == [(1, ERROR)]
+    assert problems("HIGHWAY,,-1,-1\nWP,50.9,4.48\nWP,50.91,4.49\n") == [(1, ERROR)]
+
+
+def test_highway_spacing():
+    wps = "WP,50.9,4.48\nWP,50.91,4.49\n"
+    assert problems("HIGHWAY,lib/car.obj,10,20\n" + wps) == []
+    assert problems("HIGHWAY,lib/car.obj,10\n" + wps) == [(1, ERROR)]
+    assert problems("HIGHWAY,lib/car.obj\n" + wps) == [(1, ERROR)]
+    assert problems("HIGHWAY,lib/car.obj,10,20,30\n" + wps) == [(1, ERROR)]
+    assert problems("HIGHWAY,lib/car.obj,10,fast\n" + wps) == [(1, ERROR)]
+
+
+def test_unresolved_branch():
+    # written by the generator for a BRANCHIF node where no route starts
+    text = "HIGHWAY,lib/car.obj,10,20\nWP,50.9,4.48\nBRANCHIF,None,sim/x==1\nWP,50.91,4.49\n"
+    check = LSTCheck("Objects.lst")
+    check.check_lines(text.splitlines())
+    assert [(lineno, level) for lineno, level, message in check.problems] == [(3, ERROR)]
+    assert "unresolved branch" in check.problems[0][2]
+
+
+def test_statements_outside_route():
+    # route without start command, like a generator way without description
+    check = LSTCheck("Objects.lst")
+    check.check_lines(["WP,50.9,4.48", "BRANCHIF,None,sim/x==1", "WP,50.91,4.49"])
+    messages = [message for lineno, level, message in check.problems]
+    assert len(messages) == 4
+    assert any("unresolved branch" in m for m in messages)
@@ -0,0 +1,74 @@
+# Fast doc.osm engine against ElementTree
+#
+# Both engines must give the same node and way tables, or both reject the document.
+# The fast engine may refuse documents ElementTree reads (ScanError), the automatic
+# engine then falls back to ElementTree and must give its result.
+#
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from generator import AUTO, ETREE, FAST, parse
+from osmscan import ScanError
+
+HEADER = b"<?xml version='1.0' encoding='UTF-8'?>\n<osm version='0.6' generator='WorldEditor'>\n"
+FOOTER = b"</osm>\n"
+NODES = b" <node id='-1' visible='true' lat='50.9' lon='4.48'/>\n <node id='-2' visible='true' lat='50.91' lon='4.49'/>\n"
+
+
+def osm(content: bytes, header: bytes = HEADER) -> bytes:
+    return header + content + FOOTER
+
+
+# documents both engines read
+SCANNED = {
+    "plain": osm(NODES + b" <way id='-3' visible='true'>\n  <nd ref='-1'/>\n  <nd ref='-2'/>\n  <tag k='name' v='bus'/>\n </way>\n"),
+    "double quotes": osm(b' <node id="-1" lat="50.9" lon="4.48"/>\n <way id="-3">\n  <nd ref="-1"/>\n </way>\n'),
+    "mixed quotes": osm(NODES + b""" <way id='-3'>\n  <nd ref="-1'"/>\n  <nd ref='-2"'/>\n  <tag k="k'" v='v"'/>\n </way>\n"""),
+    "entities": osm(NODES + b" <way id='-3'>\n  <nd ref='-1'/>\n  <tag k='name' v='&lt;a &amp; b&gt; &quot;c&apos; &#233;&#xe9;'/>\n </way>\n"),
+    "entity in ref": osm(NODES + b" <way id='&#45;3'>\n  <nd ref='&#45;1'/>\n </way>\n"),
+    "utf-8": osm(NODES + " <way id='-3'>\n  <tag k='name' v='Liège – ligne 4'/>\n </way>\n".encode("utf-8")),
+    "no declaration": osm(NODES, header=b"<osm>"),
+    "node tags": osm(b" <node id='-1' lat='50.9' lon='4.48'>\n  <tag k='a' v='1'/>\n </node>\n"),
+}
+
+# documents only ElementTree reads
+FALLBACK = {
+    "attribute order": osm(b" <node lat='50.9' id='-1' lon='4.48'/>\n"),
+    "latin-1": osm(NODES + " <way id='-3'>\n  <tag k='name' v='Liège'/>\n </way>\n".encode("latin-1"), header=b"<?xml version='1.0' encoding='ISO-8859-1'?>\n<osm>\n"),
+    "utf-16": "<?xml version='1.0' encoding='UTF-16'?>\n<osm><node id='-1' lat='50.9' lon='4.48'/></osm>\n".encode("utf-16"),
+    "comment": osm(b" <!-- nodes -->\n" + NODES),
+    "newline in value": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='a\nb'/>\n </way>\n"),
+    "other element": osm(NODES + b" <relation id='-4'/>\n"),
+}
+
+# documents both engines reject
+REJECTED = {
+    "undefined entity": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='&copy;'/>\n </way>\n"),
+    "bare ampersand": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='a & b'/>\n </way>\n"),
+    "null character reference": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='&#0;'/>\n </way>\n"),
+    "control character": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='a\x01b'/>\n </way>\n"),
+    "invalid utf-8": osm(NODES + b" <way id='-3'>\n  <tag k='name' v='Li\xe8ge'/>\n </way>\n"),
+}
+
+
+@pytest.mark.parametrize("name", SCANNED)
+def test_same_tables(name):
+    assert parse(SCANNED[name], engine=FAST) == parse(SCANNED[name], engine=ETREE)
+
+
+@pytest.mark.parametrize("name", FALLBACK)
+def test_fallback(name):
+    with pytest.raises(ScanError):
+        parse(FALLBACK[name], engine=FAST)
+    assert parse(FALLBACK[name], engine=AUTO) == parse(FALLBACK[name], engine=ETREE)
+
+
+@pytest.mark.parametrize("name", REJECTED)
+def test_rejected(name):
+    with pytest.raises(ScanError):
+        parse(REJECTED[name], engine=FAST)
+    with pytest.raises(ET.ParseError):
+        parse(REJECTED[name], engine=ETREE)
+    with pytest.raises(ET.ParseError):
+        parse(REJECTED[name], engine=AUTO)
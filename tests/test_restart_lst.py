@@ -0,0 +1,116 @@
+# Reset LST plugin, run outside X-Plane with fake_xp
+#
+import os
+
+import pytest
+
+import fake_xp
+
+fake_xp.install()  # before importing the plugin, that imports xp
+
+import PI_restart_lst
+from PI_restart_lst import PythonInterface, DEBOUNCE_TIME, LST_RESET_COMMAND, LST_WATCH_COMMAND, WATCH_INTERVAL, WATCH_STABLE
+
+
+@pytest.fixture
+def plugin():
+    fake_xp.reset()
+    pi = PythonInterface()
+    pi.trace = False
+    pi.XPluginStart()
+    assert pi.XPluginEnable() == 1
+    yield pi
+    pi.XPluginDisable()
+    pi.XPluginStop()
+    assert len(fake_xp.flight_loops) == 0
+
+
+@pytest.fixture
+def lst_folder(tmp_path, monkeypatch):
+    # LST plugin folder with watched files
+    monkeypatch.setattr(fake_xp, "LST_PLUGIN_PATH", str(tmp_path / "64" / "lin.xpl"))
+    for f in PI_restart_lst.WATCH_FILES:
+        (tmp_path / f).write_text("# LST\n")
+    return tmp_path
+
+
+def resets() -> list:
+    return [c[1] for c in fake_xp.calls]
+
+
+def test_single_press(plugin):
+    # a single press, reset once after debounce time, not in the command callback
+    fake_xp.command(LST_RESET_COMMAND)
+    assert resets() == []
+    fake_xp.run(DEBOUNCE_TIME + 0.5)
+    assert resets() == ["disable", "enable"]
+    assert fake_xp.calls[0][0] >= DEBOUNCE_TIME
+    assert plugin.reset_timings is not None and len(plugin.reset_timings) == 3
+
+
+def test_repeated_presses(plugin):
+    # repeated presses within the debounce window, a single reset after the last one
+    for i in range(5):
+        last = fake_xp.elapsed
+        fake_xp.command(LST_RESET_COMMAND)
+        fake_xp.run(DEBOUNCE_TIME / 2)
+    fake_xp.run(DEBOUNCE_TIME)
+    assert resets() == ["disable", "enable"]
+    assert fake_xp.calls[0][0] >= last + DEBOUNCE_TIME
+
+
+def test_press_before_first_frame(plugin):
+    # a request between enable and the first frame after it is not lost, and does not delay the timing
+    fake_xp.command(LST_RESET_COMMAND)
+    while resets() != ["disable", "enable"]:
+        fake_xp.frame()
+    enabled = fake_xp.frames
+    fake_xp.command(LST_RESET_COMMAND)
+    requested = fake_xp.elapsed
+    fake_xp.frame()
+    assert plugin.reset_enabled_at is None, "first frame not timed"
+    assert fake_xp.frames == enabled + 1
+    fake_xp.run(DEBOUNCE_TIME + 0.5)
+    assert resets() == ["disable", "enable", "disable", "enable"]
+    assert fake_xp.calls[2][0] >= requested + DEBOUNCE_TIME
+
+
+def test_idle_after_reset(plugin):
+    fake_xp.command(LST_RESET_COMMAND)
+    fake_xp.run(DEBOUNCE_TIME + 0.5)
+    count = fake_xp.flight_loop_calls
+    fake_xp.run(10)
+    assert fake_xp.flight_loop_calls == count, "flight loop called while idle"
+
+
+def test_watch_unchanged(lst_folder, plugin):
+    # nothing changes, no reset, one flight loop call per check
+    fake_xp.command(LST_WATCH_COMMAND)
+    assert plugin.watching
+    fake_xp.run(60)
+    assert resets() == []
+    assert fake_xp.flight_loop_calls <= 60 / WATCH_INTERVAL + 1
+
+
+def test_watch_changed(lst_folder, plugin):
+    # file written in several steps, a single reset once stable
+    objects = os.path.join(lst_folder, "Objects.lst")
+    fake_xp.command(LST_WATCH_COMMAND)
+    for i in range(4):
+        with open(objects, "a") as fp:
+            fp.write(f"# step {i}\n")
+        fake_xp.run(WATCH_INTERVAL)
+    assert resets() == [], "reset while file was still changing"
+    fake_xp.run(WATCH_STABLE + WATCH_INTERVAL + DEBOUNCE_TIME + 0.5)
+    assert resets() == ["disable", "enable"]
+
+
+def test_watch_toggled_off(lst_folder, plugin):
+    # watch toggled off, changes ignored
+    fake_xp.command(LST_WATCH_COMMAND)
+    fake_xp.command(LST_WATCH_COMMAND)
+    assert not plugin.watching
+    with open(os.path.join(lst_folder, "Objects.lst"), "a") as fp:
+        fp.write("# ignored\n")
+    fake_xp.run(20)
+    assert resets() == []
@@ -0,0 +1,76 @@
+# Start-up budget of command line tools
+#
+# Tools must not load heavy modules (XML, JSON, SQLite, compression, process pools,
+# library index...) until they are needed, so that --help and simple conversions
+# start about as fast as the interpreter itself.
+# Loaded modules are always checked. Start-up times depend on the machine and its load,
+# they are only measured when LST_TIMING_TESTS is set, with generous budgets.
+# Each measure runs in a fresh interpreter, best of several runs, with byte code cache enabled.
+#
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from paths import SRC
+
+TOOLS = ["converter", "generator", "lst2geojson", "lstcheck", "lstload", "lstio"]
+HEAVY = ["argparse", "biglib", "bz2", "concurrent", "gzip", "json", "lzma", "mmap", "nodestore", "osmscan", "sqlite3", "tempfile", "xml"]
+RUNS = 7
+IMPORT_BUDGET = 0.050  # seconds over importing logging, that all tools use
+HELP_BUDGET = 0.100  # seconds over importing logging and argparse
+timing = pytest.mark.skipif(not os.environ.get("LST_TIMING_TESTS"), reason="set LST_TIMING_TESTS to measure start-up times")
+SAMPLE = """# sample
+route 20 0 0 lib/bus.obj
+50.900 4.480
+50.901 4.481
+"""
+
+
+def run(args: list) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run([sys.executable] + args, cwd=SRC, env=env, capture_output=True, text=True)
+
+
+def best_time(args: list) -> float:
+    run(args)  # warms file and byte code caches
+    best = None
+    for i in range(RUNS):
+        start = time.perf_counter()
+        run(args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def loaded(code: str) -> list:
+    # heavy modules loaded after code
+    result = run(["-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"])
+    assert result.returncode == 0, result.stderr
+    return sorted(m for m in result.stdout.split() if m.split(".")[0] in HEAVY)
+
+
+@pytest.mark.parametrize("tool", TOOLS)
+def test_import_loads_no_heavy_module(tool):
+    assert loaded(f"import {tool}") == []
+
+
+def test_conversion_without_library_loads_no_heavy_module():
+    assert loaded(f"from converter import convert\nconvert(text={SAMPLE!r})") == []
+
+
+@timing
+@pytest.mark.parametrize("tool", TOOLS)
+def test_import_time(tool):
+    baseline = best_time(["-c", "import logging"])
+    assert best_time(["-c", f"import {tool}"]) - baseline < IMPORT_BUDGET
+
+
+@timing
+@pytest.mark.parametrize("tool", ["lst2geojson", "converter", "generator"])
+def test_help_time(tool):
+    baseline = best_time(["-c", "import logging, argparse"])
+    assert best_time([f"{tool}.py", "--help"]) - baseline < HELP_BUDGET